@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from carga import leer_csv_leyes
+from graficos import grafico_pastel, reporte_cache
+from leyes import ESQUEMA_MIXTO, ESQUEMA_SULFUROS, resumen_por_bandas
 
 def main_sulfuros():
     st.set_page_config(layout="wide")
@@ -8,7 +11,7 @@ def main_sulfuros():
 
     # Cargar datos
     try:
-        df = pd.read_csv("sulfuros.csv", sep=';').dropna(axis=1, how='all')
+        df = leer_csv_leyes("sulfuros.csv")
     except FileNotFoundError:
         st.error("No se encontró el archivo 'sulfuros.csv'. Asegúrate de subirlo al mismo directorio de la app.")
         return
@@ -20,37 +23,8 @@ def main_sulfuros():
             st.error(f"El archivo no contiene la columna '{col}'. Verifica el formato del CSV.")
             return
 
-    # Filtrar por categorías
-    ley_alta = df[df['%Cu'] > 1]
-    ley_media = df[(df['%Cu'] >= 0.8) & (df['%Cu'] <= 1)]
-    ley_baja = df[(df['%Cu'] >= 0.1) & (df['%Cu'] < 0.8)]
-
-    def resumen_categoria(nombre, subset):
-        total_tmh = subset['TMH'].sum()
-        total_tms = subset['TMS'].sum()
-        cu_prom = (subset['%Cu'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        au_prom = (subset['Au g/TM'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        ag_prom = (subset['Ag g/TM'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        return [nombre, total_tmh, total_tms, cu_prom, au_prom, ag_prom]
-
-    resumen_data = [
-        resumen_categoria('Ley Alta', ley_alta),
-        resumen_categoria('Ley Media', ley_media),
-        resumen_categoria('Ley Baja', ley_baja)
-    ]
-
-    # Totales
-    total_tmh = df['TMH'].sum()
-    total_tms = df['TMS'].sum()
-    cu_prom_total = (df['%Cu'] * df['TMS']).sum() / total_tms
-    au_prom_total = (df['Au g/TM'] * df['TMS']).sum() / total_tms
-    ag_prom_total = (df['Ag g/TM'] * df['TMS']).sum() / total_tms
-    resumen_data.append(['Total', total_tmh, total_tms, cu_prom_total, au_prom_total, ag_prom_total])
-
-    resumen_df = pd.DataFrame(resumen_data, columns=[
-        'Categoría', 'Total TMH', 'Total TMS', 'Promedio Ponderado %Cu',
-        'Promedio Ponderado Au g/TM', 'Promedio Ponderado Ag g/TM'
-    ])
+    # Resumen por bandas de ley
+    resumen_df = resumen_por_bandas(df, ESQUEMA_SULFUROS)
 
     # Mostrar tabla resumen
     st.subheader("Tabla Resumen:")
@@ -63,16 +37,8 @@ def main_sulfuros():
     }))
 
     # Gráfica de pastel
-    fig, ax = plt.subplots(figsize=(2,1))
-    ax.pie(
-        resumen_df.iloc[:-1]['Total TMS'],
-        labels=resumen_df.iloc[:-1]['Categoría'],
-        autopct='%1.1f%%',
-        startangle=90,
-        textprops={'fontsize':3}
-    )
-    ax.axis('equal')
-    st.pyplot(fig)
+    st.image(grafico_pastel(resumen_df.iloc[:-1]['Total TMS'], resumen_df.iloc[:-1]['Categoría']),
+             use_container_width=True)
 
 
 def main_mixto():
@@ -81,7 +47,7 @@ def main_mixto():
 
     # Cargar datos
     try:
-        df = pd.read_csv("mixto.csv", sep=';').dropna(axis=1, how='all')
+        df = leer_csv_leyes("mixto.csv")
     except FileNotFoundError:
         st.error("No se encontró el archivo 'mixto.csv'. Asegúrate de subirlo al mismo directorio de la app.")
         return
@@ -93,37 +59,8 @@ def main_mixto():
             st.error(f"El archivo no contiene la columna '{col}'. Verifica el formato del CSV.")
             return
 
-    # Filtrar por categorías
-    ley_alta = df[df['%Cu'] > 3]
-    ley_media = df[(df['%Cu'] >= 2) & (df['%Cu'] <= 3)]
-    ley_baja = df[(df['%Cu'] >= 0.1) & (df['%Cu'] < 2)]
-
-    def resumen_categoria(nombre, subset):
-        total_tmh = subset['TMH'].sum()
-        total_tms = subset['TMS'].sum()
-        cu_prom = (subset['%Cu'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        au_prom = (subset['Au g/TM'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        ag_prom = (subset['Ag g/TM'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        return [nombre, total_tmh, total_tms, cu_prom, au_prom, ag_prom]
-
-    resumen_data = [
-        resumen_categoria('Ley Alta', ley_alta),
-        resumen_categoria('Ley Media', ley_media),
-        resumen_categoria('Ley Baja', ley_baja)
-    ]
-
-    # Totales
-    total_tmh = df['TMH'].sum()
-    total_tms = df['TMS'].sum()
-    cu_prom_total = (df['%Cu'] * df['TMS']).sum() / total_tms
-    au_prom_total = (df['Au g/TM'] * df['TMS']).sum() / total_tms
-    ag_prom_total = (df['Ag g/TM'] * df['TMS']).sum() / total_tms
-    resumen_data.append(['Total', total_tmh, total_tms, cu_prom_total, au_prom_total, ag_prom_total])
-
-    resumen_df = pd.DataFrame(resumen_data, columns=[
-        'Categoría', 'Total TMH', 'Total TMS', 'Promedio Ponderado %Cu',
-        'Promedio Ponderado Au g/TM', 'Promedio Ponderado Ag g/TM'
-    ])
+    # Resumen por bandas de ley
+    resumen_df = resumen_por_bandas(df, ESQUEMA_MIXTO)
 
     # Mostrar tabla resumen
     st.subheader("Tabla Resumen:")
@@ -136,18 +73,11 @@ def main_mixto():
     }))
 
     # Gráfica de pastel
-    fig, ax = plt.subplots(figsize=(2,1))
-    ax.pie(
-        resumen_df.iloc[:-1]['Total TMS'],
-        labels=resumen_df.iloc[:-1]['Categoría'],
-        autopct='%1.1f%%',
-        startangle=90,
-          textprops={'fontsize':3}
-    )
-    ax.axis('equal')
-    st.pyplot(fig)
+    st.image(grafico_pastel(resumen_df.iloc[:-1]['Total TMS'], resumen_df.iloc[:-1]['Categoría']),
+             use_container_width=True)
 
 
 if __name__ == "__main__":
     main_sulfuros()
     main_mixto()
+    st.sidebar.caption(reporte_cache())
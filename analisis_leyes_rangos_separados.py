@@ -1,6 +1,13 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from carga import leer_csv_leyes, sumas_por_bloques, version_archivo
+from graficos import grafico_pastel, reporte_cache
+from incremental import sumas_incrementales
+from leyes import (ESQUEMA_MIXTO, ESQUEMA_SULFUROS, comparar_esquemas, esquema_tres_bandas,
+                   indice_por_fecha, intervalo_banda, resumen_por_bandas, sumas_entre_fechas,
+                   tabla_resumen)
 
 def estilo_tabla(df, color_header="#4CAF50"):
     return (
@@ -23,9 +30,38 @@ def estilo_tabla(df, color_header="#4CAF50"):
         .set_properties(**{'text-align': 'center'})
     )
 
+# Los datos y el índice por fecha se comparten entre sesiones sin copiarse
+# (cache_resource): no deben modificarse. La versión del CSV (mtime y tamaño,
+# sin leer el contenido) es parte de la clave, así que un archivo editado o
+# con filas nuevas se vuelve a procesar; en los modos incremental y por
+# bloques solo lo lee la función de lectura. max_entries acota lo retenido:
+# al editarse un CSV la versión anterior sale del caché en vez de quedar en
+# memoria hasta reiniciar (dos archivos, cada uno con su versión vigente y
+# la anterior, y un par de esquemas por archivo).
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _datos_cacheados(nombre_archivo, version):
+    return leer_csv_leyes(nombre_archivo)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _indice_cacheado(nombre_archivo, version, esquema):
+    return indice_por_fecha(_datos_cacheados(nombre_archivo, version), esquema)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _resumen_cacheado(nombre_archivo, version, esquema, rango):
+    df = _datos_cacheados(nombre_archivo, version)
+    return resumen_en_rango(df, _indice_cacheado(nombre_archivo, version, esquema), esquema, rango)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _comparacion_cacheada(nombre_archivo, version, esquemas):
+    return comparar_esquemas(_datos_cacheados(nombre_archivo, version), esquemas)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _resumen_sin_dataframe_cacheado(nombre_archivo, version, esquema, modo):
+    return tabla_resumen(MODOS_LECTURA[modo](nombre_archivo, esquema), esquema)
+
 def cargar_datos(nombre_archivo):
     try:
-        df = pd.read_csv(nombre_archivo, sep=';').dropna(axis=1, how='all')
+        df = _datos_cacheados(nombre_archivo, version_archivo(nombre_archivo))
     except FileNotFoundError:
         st.error(f"No se encontró el archivo '{nombre_archivo}'. Asegúrate de subirlo al mismo directorio de la app.")
         return None
@@ -39,73 +75,127 @@ def verificar_columnas(df):
             return False
     return True
 
-def calcular_resumen(df, ley_alta, ley_media, ley_baja, nombre, color_header):
-    def resumen_categoria(nombre_cat, subset):
-        total_tmh = subset['TMH'].sum()
-        total_tms = subset['TMS'].sum()
-        cu_prom = (subset['%Cu'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        au_prom = (subset['Au g/TM'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        ag_prom = (subset['Ag g/TM'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        return [nombre_cat, total_tmh, total_tms, cu_prom, au_prom, ag_prom]
-
-    resumen_data = [
-        resumen_categoria('Ley Alta', ley_alta),
-        resumen_categoria('Ley Media', ley_media),
-        resumen_categoria('Ley Baja', ley_baja)
-    ]
-
-    total_tmh = df['TMH'].sum()
-    total_tms = df['TMS'].sum()
-    cu_prom_total = (df['%Cu'] * df['TMS']).sum() / total_tms
-    au_prom_total = (df['Au g/TM'] * df['TMS']).sum() / total_tms
-    ag_prom_total = (df['Ag g/TM'] * df['TMS']).sum() / total_tms
-    resumen_data.append(['Total', total_tmh, total_tms, cu_prom_total, au_prom_total, ag_prom_total])
-
-    resumen_df = pd.DataFrame(resumen_data, columns=[
-        'Categoría', 'Total TMH', 'Total TMS', 'Promedio Ponderado %Cu',
-        'Promedio Ponderado Au g/TM', 'Promedio Ponderado Ag g/TM'
-    ])
+MODOS_LECTURA = {
+    "Completa": None,
+    "Incremental (solo filas nuevas)": sumas_incrementales,
+    "Por bloques (archivos muy grandes)": sumas_por_bloques,
+}
+
+def resumen_sin_dataframe(nombre_archivo, esquema, modo):
+    try:
+        return _resumen_sin_dataframe_cacheado(nombre_archivo, version_archivo(nombre_archivo), esquema, modo)
+    except FileNotFoundError:
+        st.error(f"No se encontró el archivo '{nombre_archivo}'. Asegúrate de subirlo al mismo directorio de la app.")
+    except ValueError as e:
+        st.error(f"{e} Verifica el formato del CSV.")
+    return None
+
+def selector_fechas(*dias_por_archivo):
+    dias = [d for d in dias_por_archivo if len(d)]
+    if not dias:
+        return None
+    inicio = min(d[0] for d in dias).item()
+    fin = max(d[-1] for d in dias).item()
+    if inicio == fin:
+        return None
+    return st.sidebar.slider("Rango de fechas", min_value=inicio, max_value=fin,
+                             value=(inicio, fin), format="DD/MM/YYYY")
+
+def indice_fechas(nombre_archivo, esquema):
+    return _indice_cacheado(nombre_archivo, version_archivo(nombre_archivo), esquema)
+
+def resumen_completo(nombre_archivo, esquema, rango):
+    return _resumen_cacheado(nombre_archivo, version_archivo(nombre_archivo), esquema, rango)
+
+def resumen_en_rango(df, indice, esquema, rango):
+    dias = indice[0]
+    # Sin filtro (o con todo el período) se resume el archivo completo, incluidas las filas sin FECHA
+    if (rango is None or len(dias) == 0
+            or (np.datetime64(rango[0], 'D') <= dias[0] and np.datetime64(rango[1], 'D') >= dias[-1])):
+        return resumen_por_bandas(df, esquema)
+    return tabla_resumen(sumas_entre_fechas(indice, *rango), esquema)
+
+def mostrar_resumen(resumen_df, nombre, color_header):
+    _, total_tmh, total_tms, cu_prom_total, au_prom_total, ag_prom_total = resumen_df.iloc[-1]
 
     st.markdown(f"<h2 style='text-align:center; color:{color_header};'>Tabla Resumen: {nombre}</h2>", unsafe_allow_html=True)
     st.dataframe(estilo_tabla(resumen_df, color_header), use_container_width=True)
 
+    if total_tms <= 0:
+        st.info(f"No hay toneladas de {nombre} en el rango de fechas seleccionado.")
+        return total_tmh, total_tms, cu_prom_total, au_prom_total, ag_prom_total
+
     st.markdown(f"<h3 style='text-align:center; color:{color_header};'>Gráfico de Mineral - {nombre}</h3>", unsafe_allow_html=True)
-    fig, ax = plt.subplots(figsize=(2,1))
-    ax.pie(
-        resumen_df.iloc[:-1]['Total TMS'],
-        labels=resumen_df.iloc[:-1]['Categoría'],
-        autopct='%1.1f%%',
-        startangle=90,
-        textprops={'fontsize':3}
-    )
-    ax.axis('equal')
-    st.pyplot(fig)
+    st.image(grafico_pastel(tuple(resumen_df.iloc[:-1]['Total TMS']),
+                            tuple(resumen_df.iloc[:-1]['Categoría'])),
+             use_container_width=True)
 
     return total_tmh, total_tms, cu_prom_total, au_prom_total, ag_prom_total
 
+def comparar_politicas(nombre_archivo, esquema, nombre, color_header):
+    minima, _ = intervalo_banda(esquema, 'Ley Baja')
+    inicio, fin = intervalo_banda(esquema, 'Ley Media')
+
+    with st.expander(f"Comparar política de corte - {nombre} (archivo completo)"):
+        c1, c2, c3 = st.columns(3)
+        minima = c1.number_input("Ley mínima %Cu", value=minima, step=0.1, key=f"minima_{nombre}")
+        inicio = c2.number_input("Inicio Ley Media %Cu", value=inicio, step=0.1, key=f"inicio_{nombre}")
+        fin = c3.number_input("Fin Ley Media %Cu", value=fin, step=0.1, key=f"fin_{nombre}")
+        if not minima <= inicio <= fin:
+            st.error("Los cortes deben cumplir: ley mínima ≤ inicio Ley Media ≤ fin Ley Media.")
+            return
+
+        # Ambos esquemas se evalúan sobre las mismas columnas, convertidas una sola vez
+        alternativa = esquema_tres_bandas("Alternativa", minima, inicio, fin)
+        tablas = _comparacion_cacheada(nombre_archivo, version_archivo(nombre_archivo), [esquema, alternativa])
+        for col, (titulo, tabla) in zip(st.columns(len(tablas)), tablas.items()):
+            col.markdown(f"**{titulo}**")
+            col.dataframe(estilo_tabla(tabla, color_header), use_container_width=True)
+
 def main():
     st.set_page_config(layout="wide")
     st.title("TM de Mineral Sulfuros y Mixto")
 
+    # Incremental: los CSV solo crecen al final y se leen solo las filas nuevas.
+    # Por bloques: memoria acotada sin cargar el archivo completo.
+    modo = st.sidebar.radio("Modo de lectura", list(MODOS_LECTURA))
+    lectura_completa = MODOS_LECTURA[modo] is None
+
+    if not lectura_completa:
+        st.sidebar.caption("El filtro por fechas solo está disponible con lectura completa.")
+        resumen_s = resumen_sin_dataframe("sulfuros.csv", ESQUEMA_SULFUROS, modo)
+        resumen_m = resumen_sin_dataframe("mixto.csv", ESQUEMA_MIXTO, modo)
+        if resumen_s is None or resumen_m is None:
+            return
+    else:
+        df_s = cargar_datos("sulfuros.csv")
+        if df_s is None or not verificar_columnas(df_s):
+            return
+        df_m = cargar_datos("mixto.csv")
+        if df_m is None or not verificar_columnas(df_m):
+            return
+
+        # Índice de sumas acumuladas por día: cada rango se responde sin volver a filtrar
+        dias_s = indice_fechas("sulfuros.csv", ESQUEMA_SULFUROS)[0]
+        dias_m = indice_fechas("mixto.csv", ESQUEMA_MIXTO)[0]
+        rango = selector_fechas(dias_s, dias_m)
+        resumen_s = resumen_completo("sulfuros.csv", ESQUEMA_SULFUROS, rango)
+        resumen_m = resumen_completo("mixto.csv", ESQUEMA_MIXTO, rango)
+
     # ==== Sulfuros ====
-    df_s = cargar_datos("sulfuros.csv")
-    if df_s is None or not verificar_columnas(df_s):
-        return
-    ley_alta_s = df_s[df_s['%Cu'] > 1.0]
-    ley_media_s = df_s[(df_s['%Cu'] >= 0.8) & (df_s['%Cu'] <= 1.0)]
-    ley_baja_s = df_s[(df_s['%Cu'] >= 0.1) & (df_s['%Cu'] < 0.8)]
-    total_tmh_s, total_tms_s, cu_s, au_s, ag_s = calcular_resumen(df_s, ley_alta_s, ley_media_s, ley_baja_s, "Sulfuros", "#1f77b4")
+    total_tmh_s, total_tms_s, cu_s, au_s, ag_s = mostrar_resumen(resumen_s, "Sulfuros", "#1f77b4")
 
     # ==== Mixto ====
-    df_m = cargar_datos("mixto.csv")
-    if df_m is None or not verificar_columnas(df_m):
-        return
-    ley_alta_m = df_m[df_m['%Cu'] > 3]
-    ley_media_m = df_m[(df_m['%Cu'] >= 2) & (df_m['%Cu'] <= 3)]
-    ley_baja_m = df_m[(df_m['%Cu'] >= 0.1) & (df_m['%Cu'] < 2)]
-    total_tmh_m, total_tms_m, cu_m, au_m, ag_m = calcular_resumen(df_m, ley_alta_m, ley_media_m, ley_baja_m, "Mixto", "#ff7f0e")
+    total_tmh_m, total_tms_m, cu_m, au_m, ag_m = mostrar_resumen(resumen_m, "Mixto", "#ff7f0e")
+
+    # ==== Comparación de políticas de corte ====
+    if lectura_completa:
+        comparar_politicas("sulfuros.csv", ESQUEMA_SULFUROS, "Sulfuros", "#1f77b4")
+        comparar_politicas("mixto.csv", ESQUEMA_MIXTO, "Mixto", "#ff7f0e")
 
     # ==== Resumen General ====
+    if total_tms_s + total_tms_m <= 0:
+        return
     resumen_general = pd.DataFrame([
         ["Sulfuro", total_tmh_s, total_tms_s, cu_s, au_s, ag_s],
         ["Mixto", total_tmh_m, total_tms_m, cu_m, au_m, ag_m],
@@ -119,16 +209,10 @@ def main():
     st.markdown("<h2 style='text-align:center; color:#2ca02c;'>Tabla Resumen General</h2>", unsafe_allow_html=True)
     st.dataframe(estilo_tabla(resumen_general, "#2ca02c"), use_container_width=True)
 
-    fig, ax = plt.subplots(figsize=(2,1))
-    ax.pie(
-        resumen_general.iloc[:-1]['Total TMS'],
-        labels=resumen_general.iloc[:-1]['Tipo de Material'],
-        autopct='%1.1f%%',
-        startangle=90,
-        textprops={'fontsize':3}
-    )
-    ax.axis('equal')
-    st.pyplot(fig)
+    st.image(grafico_pastel(tuple(resumen_general.iloc[:-1]['Total TMS']),
+                            tuple(resumen_general.iloc[:-1]['Tipo de Material'])),
+             use_container_width=True)
 
 if __name__ == "__main__":
     main()
+    st.sidebar.caption(reporte_cache())
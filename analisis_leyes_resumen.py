@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from carga import leer_csv_leyes
+from graficos import grafico_pastel, reporte_cache
+from leyes import ESQUEMA_MIXTO, ESQUEMA_SULFUROS, resumen_por_bandas
 
 def cargar_datos(nombre_archivo):
     try:
-        df = pd.read_csv(nombre_archivo, sep=';').dropna(axis=1, how='all')
+        df = leer_csv_leyes(nombre_archivo)
     except FileNotFoundError:
         st.error(f"No se encontró el archivo '{nombre_archivo}'. Asegúrate de subirlo al mismo directorio de la app.")
         return None
@@ -18,36 +21,9 @@ def verificar_columnas(df):
             return False
     return True
 
-def calcular_resumen(df, nombre):
-    ley_alta = df[df['%Cu'] > 3]
-    ley_media = df[(df['%Cu'] >= 2) & (df['%Cu'] <= 3)]
-    ley_baja = df[(df['%Cu'] >= 0.1) & (df['%Cu'] < 2)]
-
-    def resumen_categoria(nombre_cat, subset):
-        total_tmh = subset['TMH'].sum()
-        total_tms = subset['TMS'].sum()
-        cu_prom = (subset['%Cu'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        au_prom = (subset['Au g/TM'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        ag_prom = (subset['Ag g/TM'] * subset['TMS']).sum() / total_tms if total_tms > 0 else 0
-        return [nombre_cat, total_tmh, total_tms, cu_prom, au_prom, ag_prom]
-
-    resumen_data = [
-        resumen_categoria('Ley Alta', ley_alta),
-        resumen_categoria('Ley Media', ley_media),
-        resumen_categoria('Ley Baja', ley_baja)
-    ]
-
-    total_tmh = df['TMH'].sum()
-    total_tms = df['TMS'].sum()
-    cu_prom_total = (df['%Cu'] * df['TMS']).sum() / total_tms
-    au_prom_total = (df['Au g/TM'] * df['TMS']).sum() / total_tms
-    ag_prom_total = (df['Ag g/TM'] * df['TMS']).sum() / total_tms
-    resumen_data.append(['Total', total_tmh, total_tms, cu_prom_total, au_prom_total, ag_prom_total])
-
-    resumen_df = pd.DataFrame(resumen_data, columns=[
-        'Categoría', 'Total TMH', 'Total TMS', 'Promedio Ponderado %Cu',
-        'Promedio Ponderado Au g/TM', 'Promedio Ponderado Ag g/TM'
-    ])
+def calcular_resumen(df, nombre, esquema):
+    resumen_df = resumen_por_bandas(df, esquema)
+    _, total_tmh, total_tms, cu_prom_total, au_prom_total, ag_prom_total = resumen_df.iloc[-1]
 
     st.subheader(f"Tabla Resumen: {nombre}")
     st.dataframe(resumen_df.style.format({
@@ -58,16 +34,8 @@ def calcular_resumen(df, nombre):
         'Promedio Ponderado Ag g/TM': "{:.4f}"
     }))
 
-    fig, ax = plt.subplots(figsize=(2,1))
-    ax.pie(
-        resumen_df.iloc[:-1]['Total TMS'],
-        labels=resumen_df.iloc[:-1]['Categoría'],
-        autopct='%1.1f%%',
-        startangle=90,
-        textprops={'fontsize':3}
-    )
-    ax.axis('equal')
-    st.pyplot(fig)
+    st.image(grafico_pastel(resumen_df.iloc[:-1]['Total TMS'], resumen_df.iloc[:-1]['Categoría']),
+             use_container_width=True)
 
     return total_tmh, total_tms, cu_prom_total, au_prom_total, ag_prom_total
 
@@ -79,13 +47,13 @@ def main():
     df_s = cargar_datos("sulfuros.csv")
     if df_s is None or not verificar_columnas(df_s):
         return
-    total_tmh_s, total_tms_s, cu_s, au_s, ag_s = calcular_resumen(df_s, "Sulfuros")
+    total_tmh_s, total_tms_s, cu_s, au_s, ag_s = calcular_resumen(df_s, "Sulfuros", ESQUEMA_SULFUROS)
 
     # Mixto
     df_m = cargar_datos("mixto.csv")
     if df_m is None or not verificar_columnas(df_m):
         return
-    total_tmh_m, total_tms_m, cu_m, au_m, ag_m = calcular_resumen(df_m, "Mixto")
+    total_tmh_m, total_tms_m, cu_m, au_m, ag_m = calcular_resumen(df_m, "Mixto", ESQUEMA_MIXTO)
 
     # Resumen general
     resumen_general = pd.DataFrame([
@@ -108,16 +76,9 @@ def main():
     }))
 
     # Gráfico de pastel para resumen general
-    fig, ax = plt.subplots(figsize=(2,1))
-    ax.pie(
-        resumen_general.iloc[:-1]['Total TMS'],
-        labels=resumen_general.iloc[:-1]['Tipo de Material'],
-        autopct='%1.1f%%',
-        startangle=90,
-        textprops={'fontsize':3}
-    )
-    ax.axis('equal')
-    st.pyplot(fig)
+    st.image(grafico_pastel(resumen_general.iloc[:-1]['Total TMS'], resumen_general.iloc[:-1]['Tipo de Material']),
+             use_container_width=True)
 
 if __name__ == "__main__":
     main()
+    st.sidebar.caption(reporte_cache())
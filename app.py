@@ -3,23 +3,27 @@ Aplicación Streamlit — Correlación y Predicción MALLA 200 vs 325
 Ejecutar localmente:  streamlit run app.py
 """
 
-import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
+import hashlib
+import io
+
+from importaciones import cronometro, importar, precalentar, reporte_importaciones
+
+# Solo lo necesario para mostrar la interfaz; scipy y sklearn
+# se importan en la etapa que los usa o se precalientan en segundo plano.
+with cronometro("streamlit + pandas + numpy + matplotlib"):
+    import streamlit as st
+    import pandas as pd
+    import numpy as np
+    import matplotlib.pyplot as plt
 import warnings
 warnings.filterwarnings("ignore")
 
-from scipy import stats
-import statsmodels.api as sm
-
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures, StandardScaler
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.neural_network import MLPRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-from sklearn.pipeline import Pipeline
+from busqueda import PRESUPUESTO_S, buscar_hiperparametros
+from compilado import compilar, tabla_compilados
+from correlaciones import detalle_par, matrices_correlacion, tabla_pares
+from graficos import dispersion, grafico, reporte_cache
+from modelos import (COLUMNA_X, COLUMNA_Y, HIPERPARAMETROS, NOMBRES, entrenar_con_tiempos,
+                     limpiar_outliers, matrices, preparar_datos, validacion_cruzada)
 
 # ─────────────────────────────────────────────────────────────
 # CONFIGURACIÓN DE PÁGINA
@@ -38,22 +42,61 @@ st.markdown("Sube tu archivo CSV para analizar la correlación y entrenar modelo
 # ─────────────────────────────────────────────────────────────
 archivo = st.file_uploader("Sube el archivo CSV", type=["csv"])
 
+# Mientras el usuario elige el archivo se importan los módulos de modelado
+precalentar()
+
+def mostrar_tiempos_arranque():
+    with st.sidebar.expander("⏱️ Tiempos de arranque (importación en frío)"):
+        st.code(reporte_importaciones())
+
 if archivo is None:
     st.info("⬆️  Sube un archivo CSV para comenzar.")
+    mostrar_tiempos_arranque()
     st.stop()
 
-df = pd.read_csv(archivo)
+# ─────────────────────────────────────────────────────────────
+# ETAPAS CACHEADAS
+# Clave: hash del contenido del archivo subido (+ hiperparámetros). Cambiar
+# un widget no vuelve a leer, limpiar ni entrenar; solo predice.
+# Los parámetros con "_" no forman parte de la clave de caché.
+# Cada archivo subido es una clave nueva: max_entries y ttl acotan cuántos
+# DataFrames y modelos entrenados quedan en memoria entre sesiones.
+# ─────────────────────────────────────────────────────────────
+@st.cache_data(show_spinner=False, max_entries=8)
+def leer_csv(huella, _contenido):
+    return pd.read_csv(io.BytesIO(_contenido))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def limpiar(huella, _df):
+    datos = preparar_datos(_df)
+    _, datos_clean = limpiar_outliers(datos)
+    return datos, datos_clean
 
-COLUMNA_X = "AGIT -200M"
-COLUMNA_Y = "AGIT -325M"
+@st.cache_resource(show_spinner=False, max_entries=4, ttl=3600)
+def entrenar(huella, hiper, _X, _y):
+    return entrenar_con_tiempos(_X, _y, hiper)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def validar(huella, hiper, _X, _y):
+    return validacion_cruzada(_X, _y, hiper)
+
+@st.cache_resource(show_spinner=False, max_entries=4, ttl=3600)
+def compilar_modelos(huella, hiper, _modelos, desde, hasta):
+    return compilar(_modelos, desde, hasta)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def correlacionar(huella, _df):
+    return matrices_correlacion(_df)
+
+contenido = archivo.getvalue()
+huella    = hashlib.sha1(contenido).hexdigest()
+df        = leer_csv(huella, contenido)
 
 if COLUMNA_X not in df.columns or COLUMNA_Y not in df.columns:
     st.error(f"El archivo no contiene las columnas '{COLUMNA_X}' y '{COLUMNA_Y}'.")
     st.stop()
 
-datos = df[[COLUMNA_X, COLUMNA_Y]].dropna().copy()
-datos.columns = ["malla_200", "malla_325"]
-datos = datos[datos["malla_200"] < 200].copy()   # elimina typo 877.0
+datos, datos_clean = limpiar(huella, df)
 
 st.success(f"✅ Archivo cargado — {len(datos)} filas válidas encontradas.")
 
@@ -64,22 +107,8 @@ with st.expander("📋 Estadísticas descriptivas", expanded=False):
     st.dataframe(datos.describe().round(2))
 
 # ─────────────────────────────────────────────────────────────
-# ELIMINACIÓN DE OUTLIERS
+# ELIMINACIÓN DE OUTLIERS (IQR + Distancia de Cook)
 # ─────────────────────────────────────────────────────────────
-def mascara_iqr(serie, factor=1.5):
-    q1, q3 = serie.quantile(0.25), serie.quantile(0.75)
-    iqr = q3 - q1
-    return (serie >= q1 - factor * iqr) & (serie <= q3 + factor * iqr)
-
-mask_iqr  = mascara_iqr(datos["malla_200"]) & mascara_iqr(datos["malla_325"])
-datos_iqr = datos[mask_iqr].copy()
-
-X_sm      = sm.add_constant(datos_iqr["malla_200"])
-modelo_sm = sm.OLS(datos_iqr["malla_325"], X_sm).fit()
-cooks_d   = modelo_sm.get_influence().cooks_distance[0]
-mask_cook = cooks_d < 4 / len(datos_iqr)
-datos_clean = datos_iqr[mask_cook].reset_index(drop=True)
-
 col1, col2, col3 = st.columns(3)
 col1.metric("Datos originales",  len(datos))
 col2.metric("Outliers eliminados", len(datos) - len(datos_clean))
@@ -91,34 +120,48 @@ col3.metric("Datos limpios", len(datos_clean))
 st.markdown("---")
 st.header("1. Correlación")
 
-fig, axes = plt.subplots(1, 2, figsize=(14, 5.5))
-fig.patch.set_facecolor("#FAFAFA")
-
-for ax, xd, yd, titulo, color in [
-    (axes[0], datos["malla_200"],       datos["malla_325"],       "Con outliers", "#378ADD"),
-    (axes[1], datos_clean["malla_200"], datos_clean["malla_325"], "Sin outliers", "#1D9E75"),
-]:
-    ax.set_facecolor("#FAFAFA")
-    sl, ic, rv, _, _ = stats.linregress(xd, yd)
-    xl = np.linspace(xd.min(), xd.max(), 300)
-    ax.scatter(xd, yd, color=color, alpha=0.4, edgecolors="none", s=14, zorder=3)
-    ax.plot(xl, sl * xl + ic, color="#D85A30", lw=2, ls="--",
-            zorder=4, label="Regresión lineal")
-    texto = (f"n  = {len(xd)}\nR  = {rv:.3f}\nR² = {rv**2:.3f}\n"
-             f"y  = {sl:.3f}x + {ic:.2f}")
-    props = dict(boxstyle="round,pad=0.5", facecolor="white", edgecolor="#CCC", alpha=0.9)
-    ax.text(0.97, 0.05, texto, transform=ax.transAxes, fontsize=9,
-            va="bottom", ha="right", bbox=props, family="monospace")
-    ax.set_xlabel("AGIT -200M (%)", fontsize=10)
-    ax.set_ylabel("AGIT -325M (%)", fontsize=10)
-    ax.set_title(titulo, fontsize=12, fontweight="bold")
-    ax.grid(True, ls="--", lw=0.4, alpha=0.5, color="#CCC")
-    ax.set_axisbelow(True)
-    ax.legend(fontsize=9)
-
-plt.tight_layout()
-st.pyplot(fig)
-plt.close()
+stats = importar("scipy.stats")
+
+# Las figuras se sirven desde la caché de gráficos (ver graficos.py): con los
+# mismos datos y estilo no se vuelve a dibujar nada con matplotlib.
+ESTILO_GRAFICOS = {
+    "fondo":     "#FAFAFA",
+    "colores":   ["#378ADD", "#1D9E75", "#D85A30", "#7F77DD"],
+    "regresion": "#D85A30",
+}
+
+def figura_correlacion(paneles, estilo):
+    """Dispersión con y sin outliers, con la recta de regresión de cada panel."""
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5.5))
+    fig.patch.set_facecolor(estilo["fondo"])
+
+    for ax, (xd, yd, titulo, color) in zip(axes, paneles):
+        ax.set_facecolor(estilo["fondo"])
+        sl, ic, rv, _, _ = stats.linregress(xd, yd)
+        xl = np.linspace(xd.min(), xd.max(), 300)
+        dispersion(ax, xd, yd, color, alpha=0.4, s=14, zorder=3)
+        ax.plot(xl, sl * xl + ic, color=estilo["regresion"], lw=2, ls="--",
+                zorder=4, label="Regresión lineal")
+        texto = (f"n  = {len(xd)}\nR  = {rv:.3f}\nR² = {rv**2:.3f}\n"
+                 f"y  = {sl:.3f}x + {ic:.2f}")
+        props = dict(boxstyle="round,pad=0.5", facecolor="white", edgecolor="#CCC", alpha=0.9)
+        ax.text(0.97, 0.05, texto, transform=ax.transAxes, fontsize=9,
+                va="bottom", ha="right", bbox=props, family="monospace")
+        ax.set_xlabel("AGIT -200M (%)", fontsize=10)
+        ax.set_ylabel("AGIT -325M (%)", fontsize=10)
+        ax.set_title(titulo, fontsize=12, fontweight="bold")
+        ax.grid(True, ls="--", lw=0.4, alpha=0.5, color="#CCC")
+        ax.set_axisbelow(True)
+        ax.legend(fontsize=9)
+
+    fig.tight_layout()
+    return fig
+
+paneles = [
+    (datos["malla_200"],       datos["malla_325"],       "Con outliers", ESTILO_GRAFICOS["colores"][0]),
+    (datos_clean["malla_200"], datos_clean["malla_325"], "Sin outliers", ESTILO_GRAFICOS["colores"][1]),
+]
+st.image(grafico(figura_correlacion, paneles, ESTILO_GRAFICOS), use_container_width=True)
 
 # Métricas de correlación destacadas
 sl_c, ic_c, rv_c, pv_c, _ = stats.linregress(
@@ -136,57 +179,36 @@ c4.metric("Ecuación",     f"y = {sl_c:.3f}x + {ic_c:.2f}")
 st.markdown("---")
 st.header("2. Modelos de predicción")
 
-X = datos_clean[["malla_200"]].values
-y = datos_clean["malla_325"].values
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
-
-with st.spinner("Entrenando modelos..."):
-    modelo_lin = LinearRegression().fit(X_train, y_train)
-
-    modelo_poly = Pipeline([
-        ("poly", PolynomialFeatures(degree=2, include_bias=False)),
-        ("reg",  LinearRegression()),
-    ]).fit(X_train, y_train)
-
-    modelo_rf = RandomForestRegressor(
-        n_estimators=200, max_depth=10,
-        min_samples_leaf=5, random_state=42, n_jobs=-1
-    ).fit(X_train, y_train)
-
-    modelo_nn = Pipeline([
-        ("scaler", StandardScaler()),
-        ("mlp", MLPRegressor(
-            hidden_layer_sizes=(64, 32, 16), activation="relu",
-            max_iter=1000, random_state=42,
-            early_stopping=True, validation_fraction=0.1,
-        )),
-    ]).fit(X_train, y_train)
-
-nombres = ["Regresión Lineal", "Regresión Polinomial g=2",
-           "Random Forest",    "Red Neuronal (MLP)"]
-modelos = [modelo_lin, modelo_poly, modelo_rf, modelo_nn]
-
-resultados = []
-for nombre, modelo in zip(nombres, modelos):
-    yp   = modelo.predict(X_test)
-    rmse = np.sqrt(mean_squared_error(y_test, yp))
-    mae  = mean_absolute_error(y_test, yp)
-    r2   = r2_score(y_test, yp)
-    resultados.append({"Modelo": nombre, "RMSE": rmse, "MAE": mae, "R²": r2})
-
-df_res = pd.DataFrame(resultados).set_index("Modelo")
-
-# Ranking combinado
-df_res["rank_R2"]   = df_res["R²"].rank(ascending=False)
-df_res["rank_RMSE"] = df_res["RMSE"].rank(ascending=True)
-df_res["rank_MAE"]  = df_res["MAE"].rank(ascending=True)
-df_res["rank_prom"] = (df_res["rank_R2"] + df_res["rank_RMSE"] + df_res["rank_MAE"]) / 3
-mejor_global = df_res["rank_prom"].idxmin()
+X, y = matrices(datos_clean)
+k = HIPERPARAMETROS["pliegues"]
+
+# Búsqueda opcional de hiperparámetros de RF y MLP (reducción sucesiva con
+# presupuesto de tiempo). El resultado queda en caché en disco por datos y
+# espacio de búsqueda: con el mismo archivo no se vuelve a buscar.
+hiper = HIPERPARAMETROS
+st.sidebar.markdown("### Hiperparámetros")
+if st.sidebar.checkbox("Buscar hiperparámetros de RF y MLP"):
+    presupuesto = st.sidebar.slider("Presupuesto de búsqueda (s)", 10, 600, PRESUPUESTO_S, step=10)
+    with st.spinner(f"Buscando hiperparámetros (máx. {presupuesto} s)..."):
+        hiper, df_ensayos, desde_cache = buscar_hiperparametros(X, y, HIPERPARAMETROS,
+                                                                presupuesto_s=presupuesto)
+    origen = "búsqueda previa en caché" if desde_cache else f"{len(df_ensayos)} ensayos"
+    st.info(f"🔎 Hiperparámetros buscados ({origen}) — "
+            f"Random Forest: {hiper['rf']}  ·  MLP: {hiper['mlp']}")
+    with st.expander("Ensayos de la búsqueda"):
+        st.dataframe(df_ensayos.round(4), use_container_width=True, hide_index=True)
+
+# Las métricas y el ranking salen de la validación cruzada (k pliegues × 4
+# modelos en paralelo); los modelos finales se entrenan con todos los datos
+# limpios, también en paralelo (un hilo por modelo)
+with st.spinner(f"Validación cruzada ({k} pliegues) y entrenamiento..."):
+    df_res, mejor_global, df_pliegues = validar(huella, hiper, X, y)
+    modelos, tiempos_ajuste = entrenar(huella, hiper, X, y)
+
+nombres = NOMBRES
 
 # Tabla de métricas con resaltado
-st.subheader("Métricas (datos de prueba — 20%)")
+st.subheader(f"Métricas (validación cruzada, {k} pliegues — media y desviación estándar)")
 
 def resaltar_mejor(s):
     """Verde en la fila del mejor modelo."""
@@ -199,82 +221,97 @@ def resaltar_mejor(s):
     return estilos
 
 st.dataframe(
-    df_res[["RMSE", "MAE", "R²"]].round(4).style.apply(resaltar_mejor, axis=1),
+    df_res[["RMSE", "RMSE ±", "MAE", "MAE ±", "R²", "R² ±"]].round(4)
+    .style.apply(resaltar_mejor, axis=1),
     use_container_width=True,
 )
+with st.expander("Métricas por pliegue"):
+    st.dataframe(df_pliegues.sort_values(["Pliegue", "Modelo"]).round(4),
+                 use_container_width=True, hide_index=True)
 st.success(f"🏆 **Mejor modelo global: {mejor_global}**  "
            f"(R² = {df_res.loc[mejor_global, 'R²']:.4f}  |  "
-           f"RMSE = {df_res.loc[mejor_global, 'RMSE']:.4f})")
+           f"RMSE = {df_res.loc[mejor_global, 'RMSE']:.4f}, promedio de {k} pliegues)")
+st.caption("⏱️ Tiempo de ajuste (entrenamiento en paralelo): " +
+           "  ·  ".join(f"{nombre}: {seg:.2f} s" for nombre, seg in tiempos_ajuste.items()))
 
 # ─────────────────────────────────────────────────────────────
 # Gráfica comparativa de curvas
 # ─────────────────────────────────────────────────────────────
 st.subheader("Curvas de los modelos sobre los datos")
 
-colores  = ["#378ADD", "#1D9E75", "#D85A30", "#7F77DD"]
 x_rango  = np.linspace(X.min(), X.max(), 300).reshape(-1, 1)
 
-fig2, ax2 = plt.subplots(figsize=(10, 6))
-fig2.patch.set_facecolor("#FAFAFA")
-ax2.set_facecolor("#FAFAFA")
-ax2.scatter(datos_clean["malla_200"], datos_clean["malla_325"],
-            color="#888787", alpha=0.2, s=10, zorder=2, label="Datos limpios")
-
-for nombre, modelo, color in zip(nombres, modelos, colores):
-    r2v = df_res.loc[nombre, "R²"]
-    lw  = 3.0 if nombre == mejor_global else 1.8
-    ls  = "-"  if nombre == mejor_global else "--"
-    etiq = (f"★ {nombre} (R²={r2v:.3f})"
-            if nombre == mejor_global else f"{nombre} (R²={r2v:.3f})")
-    ax2.plot(x_rango, modelo.predict(x_rango), color=color,
-             lw=lw, ls=ls, label=etiq, zorder=3)
-
-ax2.set_xlabel("AGIT -200M (%)", fontsize=11)
-ax2.set_ylabel("AGIT -325M (%)", fontsize=11)
-ax2.set_title("Comparación de modelos\n(línea sólida = mejor modelo)",
-              fontsize=12, fontweight="bold")
-ax2.legend(fontsize=9.5, framealpha=0.9)
-ax2.grid(True, ls="--", lw=0.4, alpha=0.5, color="#CCC")
-ax2.set_axisbelow(True)
-plt.tight_layout()
-st.pyplot(fig2)
-plt.close()
+def figura_curvas(x_datos, y_datos, x_rango, curvas, mejor_global, estilo):
+    """Datos limpios y la curva de cada modelo; el mejor en línea sólida."""
+    fig2, ax2 = plt.subplots(figsize=(10, 6))
+    fig2.patch.set_facecolor(estilo["fondo"])
+    ax2.set_facecolor(estilo["fondo"])
+    dispersion(ax2, x_datos, y_datos, "#888787", alpha=0.2, s=10, zorder=2, label="Datos limpios")
+
+    for (nombre, y_pred, r2v), color in zip(curvas, estilo["colores"]):
+        lw  = 3.0 if nombre == mejor_global else 1.8
+        ls  = "-"  if nombre == mejor_global else "--"
+        etiq = (f"★ {nombre} (R²={r2v:.3f})"
+                if nombre == mejor_global else f"{nombre} (R²={r2v:.3f})")
+        ax2.plot(x_rango, y_pred, color=color,
+                 lw=lw, ls=ls, label=etiq, zorder=3)
+
+    ax2.set_xlabel("AGIT -200M (%)", fontsize=11)
+    ax2.set_ylabel("AGIT -325M (%)", fontsize=11)
+    ax2.set_title("Comparación de modelos\n(línea sólida = mejor modelo)",
+                  fontsize=12, fontweight="bold")
+    ax2.legend(fontsize=9.5, framealpha=0.9)
+    ax2.grid(True, ls="--", lw=0.4, alpha=0.5, color="#CCC")
+    ax2.set_axisbelow(True)
+    fig2.tight_layout()
+    return fig2
+
+curvas = [(nombre, modelo.predict(x_rango), df_res.loc[nombre, "R²"])
+          for nombre, modelo in zip(nombres, modelos)]
+st.image(grafico(figura_curvas, datos_clean["malla_200"], datos_clean["malla_325"],
+                 x_rango, curvas, mejor_global, ESTILO_GRAFICOS),
+         use_container_width=True)
 
 # ─────────────────────────────────────────────────────────────
 # Gráfica de barras de métricas
 # ─────────────────────────────────────────────────────────────
 st.subheader("Comparación de métricas por modelo")
 
-fig3, axes3 = plt.subplots(1, 3, figsize=(13, 4.5))
-fig3.patch.set_facecolor("#FAFAFA")
-fig3.suptitle("RMSE / MAE / R² por modelo", fontsize=13, fontweight="bold")
-nombres_cortos = ["Lineal", "Polinomial", "Random\nForest", "Red\nNeuronal"]
-
-for ax, metrica, titulo in zip(
-    axes3,
-    ["RMSE", "MAE", "R²"],
-    ["RMSE  (↓ mejor)", "MAE  (↓ mejor)", "R²  (↑ mejor)"],
-):
-    ax.set_facecolor("#FAFAFA")
-    valores  = df_res[metrica].values
-    idx_best = np.argmax(valores) if metrica == "R²" else np.argmin(valores)
-    barras   = ax.bar(nombres_cortos, valores, color=colores,
-                      width=0.55, edgecolor="white")
-    barras[idx_best].set_edgecolor("black")
-    barras[idx_best].set_linewidth(2.5)
-    for b, v in zip(barras, valores):
-        ax.text(b.get_x() + b.get_width() / 2,
-                b.get_height() + max(valores) * 0.01,
-                f"{v:.3f}", ha="center", va="bottom", fontsize=9)
-    ax.set_title(titulo, fontsize=10, pad=6)
-    ax.set_ylim(0, max(valores) * 1.2)
-    ax.grid(axis="y", ls="--", lw=0.4, alpha=0.5, color="#CCC")
-    ax.set_axisbelow(True)
-    ax.tick_params(axis="x", labelsize=8.5)
-
-plt.tight_layout()
-st.pyplot(fig3)
-plt.close()
+def figura_metricas(df_res, k, estilo):
+    """Barras de RMSE / MAE / R² con su desviación entre pliegues."""
+    fig3, axes3 = plt.subplots(1, 3, figsize=(13, 4.5))
+    fig3.patch.set_facecolor(estilo["fondo"])
+    fig3.suptitle(f"RMSE / MAE / R² por modelo (media ± desv. estándar, {k} pliegues)",
+                  fontsize=13, fontweight="bold")
+    nombres_cortos = ["Lineal", "Polinomial", "Random\nForest", "Red\nNeuronal"]
+
+    for ax, metrica, titulo in zip(
+        axes3,
+        ["RMSE", "MAE", "R²"],
+        ["RMSE  (↓ mejor)", "MAE  (↓ mejor)", "R²  (↑ mejor)"],
+    ):
+        ax.set_facecolor(estilo["fondo"])
+        valores  = df_res[metrica].values
+        idx_best = np.argmax(valores) if metrica == "R²" else np.argmin(valores)
+        barras   = ax.bar(nombres_cortos, valores, color=estilo["colores"],
+                          width=0.55, edgecolor="white",
+                          yerr=df_res[f"{metrica} ±"].values, capsize=4)
+        barras[idx_best].set_edgecolor("black")
+        barras[idx_best].set_linewidth(2.5)
+        for b, v in zip(barras, valores):
+            ax.text(b.get_x() + b.get_width() / 2,
+                    b.get_height() + max(valores) * 0.01,
+                    f"{v:.3f}", ha="center", va="bottom", fontsize=9)
+        ax.set_title(titulo, fontsize=10, pad=6)
+        ax.set_ylim(0, max(valores) * 1.2)
+        ax.grid(axis="y", ls="--", lw=0.4, alpha=0.5, color="#CCC")
+        ax.set_axisbelow(True)
+        ax.tick_params(axis="x", labelsize=8.5)
+
+    fig3.tight_layout()
+    return fig3
+
+st.image(grafico(figura_metricas, df_res, k, ESTILO_GRAFICOS), use_container_width=True)
 
 # ─────────────────────────────────────────────────────────────
 # SECCIÓN 3 — PREDICCIÓN INTERACTIVA
@@ -293,9 +330,17 @@ val_input = st.number_input(
     format="%.1f",
 )
 
+# Predicción compilada: cada modelo tabulado una vez sobre el rango de
+# entrenamiento (ver compilado.py); responde sin recorrer árboles ni red
+modelos_pred = modelos
+if st.checkbox("Predicción compilada (tabla)", help="Más rápida; error máximo indicado abajo"):
+    modelos_pred = compilar_modelos(huella, hiper, modelos, float(X.min()), float(X.max()))
+    with st.expander("Modelos compilados: error máximo y tamaño"):
+        st.dataframe(tabla_compilados(modelos, modelos_pred).round(6), use_container_width=True)
+
 xv = np.array([[val_input]])
 pred_data = []
-for nombre, modelo in zip(nombres, modelos):
+for nombre, modelo in zip(nombres, modelos_pred):
     pred = modelo.predict(xv)[0]
     pred_data.append({
         "Modelo": nombre,
@@ -314,16 +359,99 @@ st.dataframe(
     use_container_width=True,
 )
 
-mejor_pred = modelos[nombres.index(mejor_global)].predict(xv)[0]
+mejor_pred = modelos_pred[nombres.index(mejor_global)].predict(xv)[0]
 st.metric(
     label=f"Predicción con el mejor modelo ({mejor_global})",
     value=f"{mejor_pred:.2f} %",
     delta=f"AGIT -200M ingresado: {val_input:.1f}%",
 )
 
+# ─────────────────────────────────────────────────────────────
+# SECCIÓN 4 — EXPLORADOR DE CORRELACIONES
+# ─────────────────────────────────────────────────────────────
+st.markdown("---")
+st.header("4. Explorador de correlaciones")
+st.markdown("Correlación de **todas** las columnas numéricas del archivo, por pares "
+            "completos (cada par usa solo las filas donde ambas columnas tienen dato).")
+
+with st.spinner("Calculando matrices de correlación..."):
+    matrices_corr = correlacionar(huella, df)
+
+def figura_mapa_calor(matriz, n, titulo, estilo):
+    """Mapa de calor de la matriz de correlación; cada celda con r y su n."""
+    columnas = list(matriz.columns)
+    fig4, ax4 = plt.subplots(figsize=(1.0 + 0.65 * len(columnas), 0.5 + 0.55 * len(columnas)))
+    fig4.patch.set_facecolor(estilo["fondo"])
+    imagen = ax4.imshow(matriz.to_numpy(), cmap="RdBu_r", vmin=-1, vmax=1)
+    for i in range(len(columnas)):
+        for j in range(len(columnas)):
+            r = matriz.iat[i, j]
+            if np.isfinite(r):
+                ax4.text(j, i, f"{r:.2f}\nn={n.iat[i, j]}", ha="center", va="center", fontsize=5.5,
+                         color="white" if abs(r) > 0.6 else "black")
+    ax4.set_xticks(range(len(columnas)), columnas, rotation=60, ha="right", fontsize=8)
+    ax4.set_yticks(range(len(columnas)), columnas, fontsize=8)
+    ax4.set_title(titulo, fontsize=12, fontweight="bold")
+    fig4.colorbar(imagen, ax=ax4, fraction=0.04, pad=0.02)
+    fig4.tight_layout()
+    return fig4
+
+metodo_corr = st.radio("Coeficiente", ["Pearson", "Spearman"], horizontal=True)
+clave_corr  = metodo_corr.lower()
+st.image(grafico(figura_mapa_calor, matrices_corr[clave_corr], matrices_corr["n"],
+                 f"Correlación de {metodo_corr} (pares completos)", ESTILO_GRAFICOS),
+         use_container_width=True)
+
+with st.expander("Todos los pares (ordenados por |Pearson|)"):
+    st.dataframe(tabla_pares(matrices_corr).round(4), use_container_width=True, hide_index=True)
+
+# Detalle de un par: valores exactos sobre sus filas completas
+columnas_corr = list(matrices_corr["n"].columns)
+d1, d2 = st.columns(2)
+par_x = d1.selectbox("Columna X", columnas_corr, index=columnas_corr.index(COLUMNA_X))
+par_y = d2.selectbox("Columna Y", columnas_corr, index=columnas_corr.index(COLUMNA_Y))
+datos_par, detalle = detalle_par(df, par_x, par_y)
+
+if par_x == par_y:
+    st.info("Elige dos columnas distintas para ver el detalle del par.")
+elif "Pearson" not in detalle:
+    st.warning(f"El par tiene {detalle['n']} filas completas o una columna constante; "
+               f"no hay correlación que mostrar.")
+else:
+    e1, e2, e3, e4, e5 = st.columns(5)
+    e1.metric("Filas completas", detalle["n"])
+    e2.metric("Pearson r", f"{detalle['Pearson']:.4f}")
+    e3.metric("p (Pearson)", f"{detalle['p Pearson']:.2e}")
+    e4.metric("Spearman ρ", f"{detalle['Spearman']:.4f}")
+    e5.metric("p (Spearman)", f"{detalle['p Spearman']:.2e}")
+
+    def figura_par(x, y, pendiente, intercepto, estilo):
+        """Dispersión del par con su recta de regresión."""
+        fig5, ax5 = plt.subplots(figsize=(9, 5))
+        fig5.patch.set_facecolor(estilo["fondo"])
+        ax5.set_facecolor(estilo["fondo"])
+        dispersion(ax5, x, y, estilo["colores"][0], alpha=0.4, s=12, zorder=3)
+        xl = np.linspace(x.min(), x.max(), 300)
+        ax5.plot(xl, pendiente * xl + intercepto, color=estilo["regresion"], lw=2, ls="--",
+                 zorder=4, label=f"y = {pendiente:.3f}x + {intercepto:.2f}")
+        ax5.set_xlabel(x.name, fontsize=10)
+        ax5.set_ylabel(y.name, fontsize=10)
+        ax5.grid(True, ls="--", lw=0.4, alpha=0.5, color="#CCC")
+        ax5.set_axisbelow(True)
+        ax5.legend(fontsize=9)
+        fig5.tight_layout()
+        return fig5
+
+    st.image(grafico(figura_par, datos_par[par_x], datos_par[par_y],
+                     detalle["pendiente"], detalle["intercepto"], ESTILO_GRAFICOS),
+             use_container_width=True)
+
 # ─────────────────────────────────────────────────────────────
 # PIE DE PÁGINA
 # ─────────────────────────────────────────────────────────────
 st.markdown("---")
 st.caption("Análisis de correlación AGIT -200M vs AGIT -325M  |  "
-           "Modelos: Lineal · Polinomial · Random Forest · MLP")
\ No newline at end of file
+           "Modelos: Lineal · Polinomial · Random Forest · MLP")
+
+mostrar_tiempos_arranque()
+st.sidebar.caption(reporte_cache())
\ No newline at end of file
@@ -12,20 +12,45 @@ import streamlit as st
 import pandas as pd
 import os
 
+from carga import huella_archivo, leer_csv_leyes
+from graficos import PUNTOS_SERIE, grafico, reducir_serie, reporte_cache
+
+CSV_PATH = "sulfuros.csv"  # Ajusta el nombre de tu CSV si es distinto
+METODOS = {"LTTB (forma de la curva)": "lttb", "Mín / máx por tramo": "minmax"}
+
 # Configuración de la página para que ocupe todo el ancho
 st.set_page_config(layout="wide")
 
-# Cargar datos
+# Cargar datos (CSV separado por ';', FECHA como fecha; ver carga.py)
 @st.cache_data
-def load_data():
-    csv_path = "sulfuros.csv"  # Ajusta el nombre de tu CSV si es distinto
-    if os.path.exists(csv_path):
-        return pd.read_csv(csv_path)
-    else:
-        st.error(f"No se encontró el archivo {csv_path}")
-        return pd.DataFrame()
+def load_data(huella):
+    return leer_csv_leyes(CSV_PATH)
+
+# Cada serie se reduce a un número fijo de puntos antes de dibujar: el
+# gráfico cuesta lo mismo con un mes que con varios años de datos
+@st.cache_data(show_spinner=False)
+def series_reducidas(huella, columnas, puntos, metodo, _df):
+    fechas = _df["FECHA"].to_numpy()
+    return [(col, *reducir_serie(fechas, _df[col].to_numpy(), puntos, metodo)) for col in columnas]
 
-df = load_data()
+def figura_series(series):
+    """Una fila por columna, todas contra FECHA."""
+    fig, axes = plt.subplots(len(series), 1, figsize=(12, 2.2 * len(series)),
+                             sharex=True, squeeze=False)
+    for ax, (col, fechas, valores) in zip(axes[:, 0], series):
+        ax.plot(fechas, valores, lw=0.8)
+        ax.set_ylabel(col)
+        ax.grid(True, ls="--", lw=0.4, alpha=0.5)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    return fig
+
+if os.path.exists(CSV_PATH):
+    huella = huella_archivo(CSV_PATH)
+    df = load_data(huella)
+else:
+    st.error(f"No se encontró el archivo {CSV_PATH}")
+    huella, df = None, pd.DataFrame()
 
 # Mostrar título
 st.title("Reporte de Tonelaje - Cobre")
@@ -34,9 +59,17 @@ st.title("Reporte de Tonelaje - Cobre")
 if not df.empty:
     st.dataframe(df)
 
-    # Ejemplo de gráfico
-    fig, ax = plt.subplots()
-    df.plot(ax=ax)
-    st.pyplot(fig)
+    # Series de tiempo por FECHA
+    numericas = list(df.select_dtypes("number").columns)
+    columnas = st.sidebar.multiselect("Series", numericas, default=numericas)
+    puntos = st.sidebar.slider("Puntos por serie", 200, 10_000, PUNTOS_SERIE, step=100)
+    metodo = METODOS[st.sidebar.radio("Reducción", list(METODOS))]
+
+    if "FECHA" not in df.columns:
+        st.warning("El archivo no tiene columna FECHA.")
+    elif columnas:
+        series = series_reducidas(huella, tuple(columnas), puntos, metodo, df)
+        st.image(grafico(figura_series, series), use_container_width=True)
+        st.caption(f"{len(df)} filas → hasta {puntos} puntos por serie · {reporte_cache()}")
 else:
     st.warning("No hay datos para mostrar.")
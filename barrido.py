@@ -0,0 +1,181 @@
+"""
+Barrido de comparación de modelos sobre pares de columnas.
+
+Corre para cada par X → Y el mismo flujo de malla 200.py (IQR + Cook, los
+cuatro modelos con validación cruzada de k pliegues y ranking combinado
+rank_prom) y junta los resultados en una tabla de posiciones: un renglón
+por par con su mejor modelo, ordenados por R² de validación cruzada.
+Cada columna se limpia igual en todos los pares: el filtro del valor
+erróneo de AGIT -200M se aplica a esa columna sea X o Y, y a ninguna otra.
+Cada par es independiente, así que se reparten entre procesos (uno por
+núcleo por defecto); dentro de cada proceso la validación usa un solo hilo.
+
+Uso:
+    python barrido.py "Data_Ordenada_Lineas_Agitador_Torta (1).csv"
+    python barrido.py datos.csv --x "AGIT -200M" --y "L1 -325M" "L9 -325M" --procesos 8
+    python barrido.py datos.csv --salida ranking.csv --detalle ranking_modelos.csv
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from modelos import (HIPERPARAMETROS, LIMPIEZA, NOMBRES, limpiar_outliers, matrices, preparar_datos,
+                     validacion_cruzada)
+
+# Pares con menos filas completas no se evalúan
+MINIMO_FILAS = 50
+
+# Datos de trabajo de cada proceso (se envían una sola vez, al iniciarlo)
+_datos_proceso = None
+
+
+def pares_columnas(df, columnas_x=None, columnas_y=None, minimo_filas=MINIMO_FILAS):
+    """
+    Pares (X, Y) ordenados y distintos de columnas numéricas (o de las
+    listas dadas). Devuelve (pares, omitidos) donde omitidos son los pares
+    con menos de `minimo_filas` filas completas, con su número de filas.
+    """
+    numericas = list(df.select_dtypes("number").columns)
+    columnas_x = list(columnas_x or numericas)
+    columnas_y = list(columnas_y or numericas)
+    faltantes = [c for c in columnas_x + columnas_y if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Columnas inexistentes: {', '.join(dict.fromkeys(faltantes))}")
+
+    presentes = df[list(dict.fromkeys(columnas_x + columnas_y))].notna()
+    pares, omitidos = [], []
+    for x in columnas_x:
+        for y in columnas_y:
+            if x == y:
+                continue
+            filas = int((presentes[x] & presentes[y]).sum())
+            (pares if filas >= minimo_filas else omitidos).append((x, y, filas))
+    return [(x, y) for x, y, _ in pares], omitidos
+
+
+def _iniciar(datos):
+    global _datos_proceso
+    _datos_proceso = datos
+
+
+def evaluar_par(columna_x, columna_y, df=None, hiper=HIPERPARAMETROS, limpieza=LIMPIEZA):
+    """
+    Flujo completo de un par. Devuelve (resumen, df_cv): resumen es el
+    renglón del par en la tabla de posiciones y df_cv la tabla por modelo
+    de validacion_cruzada.
+    """
+    df = _datos_proceso if df is None else df
+    inicio = time.perf_counter()
+    datos = preparar_datos(df, columna_x, columna_y, limpieza)
+    _, datos_clean = limpiar_outliers(datos, limpieza=limpieza)
+    X, y = matrices(datos_clean)
+    if len(X) < hiper["pliegues"] * 2:
+        raise ValueError(f"solo {len(X)} filas después de la limpieza")
+    df_cv, mejor, _ = validacion_cruzada(X, y, hiper, hilos=1)
+
+    resumen = {
+        "X": columna_x, "Y": columna_y,
+        "Filas": len(datos), "Filas limpias": len(datos_clean),
+        "Mejor modelo": mejor,
+        **{metrica: df_cv.loc[mejor, metrica] for metrica in ("RMSE", "MAE", "R²", "R² ±")},
+        **{f"R² ({nombre})": df_cv.loc[nombre, "R²"] for nombre in NOMBRES},
+        "Segundos": time.perf_counter() - inicio,
+    }
+    return resumen, df_cv
+
+
+def _evaluar_tarea(par, hiper, limpieza):
+    try:
+        return par, *evaluar_par(*par, hiper=hiper, limpieza=limpieza), None
+    except Exception as e:
+        return par, None, None, str(e)
+
+
+def barrido(df, pares, hiper=HIPERPARAMETROS, limpieza=LIMPIEZA, procesos=None, informar=None):
+    """
+    Evalúa los pares en un pool de procesos. `informar(hechos, total, par,
+    resumen, error)` se llama al terminar cada par.
+
+    Devuelve (df_posiciones, df_detalle, errores): la tabla de posiciones
+    ordenada por R² del mejor modelo, el detalle por par y modelo, y la
+    lista de (par, error) de los pares que no se pudieron evaluar.
+    """
+    columnas = list(dict.fromkeys(c for par in pares for c in par))
+    resumenes, detalles, errores = [], [], []
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar,
+                             initargs=(df[columnas],)) as pool:
+        futuros = [pool.submit(_evaluar_tarea, par, hiper, limpieza) for par in pares]
+        for hechos, futuro in enumerate(as_completed(futuros), start=1):
+            par, resumen, df_cv, error = futuro.result()
+            if error is not None:
+                errores.append((par, error))
+            else:
+                resumenes.append(resumen)
+                detalles.append(df_cv.reset_index().assign(X=par[0], Y=par[1]))
+            if informar is not None:
+                informar(hechos, len(pares), par, resumen, error)
+
+    df_posiciones = pd.DataFrame(resumenes)
+    if not df_posiciones.empty:
+        df_posiciones = df_posiciones.sort_values("R²", ascending=False, ignore_index=True)
+        df_posiciones.insert(0, "Posición", range(1, len(df_posiciones) + 1))
+    df_detalle = pd.concat(detalles, ignore_index=True) if detalles else pd.DataFrame()
+    if not df_detalle.empty:
+        df_detalle = df_detalle[["X", "Y"] + [c for c in df_detalle.columns if c not in ("X", "Y")]]
+    return df_posiciones, df_detalle, errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los cuatro modelos en todos los pares X → Y de un CSV.")
+    parser.add_argument("datos", help="CSV con las columnas de las líneas (p. ej. Data_Ordenada_...csv)")
+    parser.add_argument("--x", nargs="+", help="columnas X a usar (por defecto, todas las numéricas)")
+    parser.add_argument("--y", nargs="+", help="columnas Y a usar (por defecto, todas las numéricas)")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--min-filas", type=int, default=MINIMO_FILAS, help="filas completas mínimas por par")
+    parser.add_argument("--salida", default="barrido_modelos.csv", help="CSV de la tabla de posiciones")
+    parser.add_argument("--detalle", help="CSV con las métricas de cada modelo en cada par")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.datos)
+    try:
+        pares, omitidos = pares_columnas(df, args.x, args.y, args.min_filas)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    for x, y, filas in omitidos:
+        print(f"  - {x} → {y}: omitido ({filas} filas completas)")
+    if not pares:
+        print("No hay pares con datos suficientes.")
+        sys.exit(1)
+
+    print(f"Evaluando {len(pares)} pares...")
+    inicio = time.perf_counter()
+
+    def informar(hechos, total, par, resumen, error):
+        transcurrido = time.perf_counter() - inicio
+        detalle = (f"error: {error}" if error is not None
+                   else f"{resumen['Mejor modelo']} (R² {resumen['R²']:.3f})")
+        print(f"  [{hechos}/{total}] {par[0]} → {par[1]}: {detalle}  ({transcurrido:.0f} s)")
+
+    df_posiciones, df_detalle, errores = barrido(df, pares, procesos=args.procesos, informar=informar)
+
+    pd.set_option("display.width", 200)
+    print(f"\nTabla de posiciones ({len(df_posiciones)} pares, {time.perf_counter() - inicio:.0f} s)")
+    if not df_posiciones.empty:
+        columnas = ["Posición", "X", "Y", "Filas limpias", "Mejor modelo", "RMSE", "MAE", "R²"]
+        print(df_posiciones[columnas].round(4).to_string(index=False))
+        df_posiciones.to_csv(args.salida, index=False)
+        print(f"\n  → Guardada: {args.salida}")
+    if args.detalle and not df_detalle.empty:
+        df_detalle.to_csv(args.detalle, index=False)
+        print(f"  → Guardada: {args.detalle}")
+    for (x, y), error in errores:
+        print(f"  ! {x} → {y}: {error}")
+
+
+if __name__ == "__main__":
+    main()
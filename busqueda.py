@@ -0,0 +1,248 @@
+"""
+Búsqueda de hiperparámetros del Random Forest y la MLP por reducción
+sucesiva (successive halving) con presupuesto de tiempo.
+
+Todos los candidatos se prueban primero con pocas filas de entrenamiento;
+en cada ronda sigue solo el mejor tercio (menor RMSE de validación) y las
+filas se triplican, hasta usar todo el conjunto de entrenamiento. Los
+ensayos de cada ronda corren en paralelo y dejan de lanzarse al agotarse
+el presupuesto; gana el mejor de la última ronda completada.
+
+Los resultados se guardan en .cache_modelos/busquedas.json con clave
+huella de los datos + firma del espacio de búsqueda: repetir la búsqueda
+sobre los mismos datos es instantáneo, y con datos nuevos la mejor
+configuración conocida para ese espacio entra como candidato (arranque en
+caliente). Una búsqueda cortada por el presupuesto queda marcada como
+incompleta: se reutiliza con un presupuesto igual o menor, y con uno mayor
+se repite partiendo de sus mejores parámetros. El archivo guarda a lo sumo
+MAX_BUSQUEDAS resultados (se descartan los más antiguos).
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from importaciones import importar
+from modelos import DIRECTORIO_MODELOS, HIPERPARAMETROS, NOMBRES, construir_modelos, huella_datos
+
+ARCHIVO_BUSQUEDAS = "busquedas.json"
+
+# Valores a probar por modelo (claves de HIPERPARAMETROS["rf"] / ["mlp"])
+ESPACIOS = {
+    "rf": {
+        "n_estimators": [100, 200, 400],
+        "max_depth": [6, 10, 14, None],
+        "min_samples_leaf": [2, 5, 10, 20],
+    },
+    "mlp": {
+        "hidden_layer_sizes": [(32, 16), (64, 32, 16), (128, 64)],
+        "alpha": [1e-4, 1e-3, 1e-2],
+        "learning_rate_init": [1e-3, 3e-3],
+    },
+}
+
+# Posición de cada modelo buscado en construir_modelos / NOMBRES
+_INDICE_MODELO = {"rf": 2, "mlp": 3}
+
+PRESUPUESTO_S = 60
+CANDIDATOS = 9
+ETA = 3
+FILAS_MINIMAS = 200
+MAX_BUSQUEDAS = 50
+
+
+def firma_espacio(espacios=ESPACIOS, candidatos=CANDIDATOS, eta=ETA):
+    """Identificador corto del espacio de búsqueda y de la forma de recorrerlo."""
+    texto = json.dumps([espacios, candidatos, eta], sort_keys=True, default=list)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:12]
+
+
+def _ruta_busquedas():
+    return os.path.join(DIRECTORIO_MODELOS, ARCHIVO_BUSQUEDAS)
+
+
+def _leer_busquedas():
+    try:
+        with open(_ruta_busquedas(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"resultados": {}, "mejores": {}}
+
+
+def _guardar_busquedas(busquedas):
+    ruta = _ruta_busquedas()
+    try:
+        os.makedirs(DIRECTORIO_MODELOS, exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(busquedas, f, indent=1)
+        os.replace(temporal, ruta)
+    except OSError:
+        pass
+
+
+def _desde_json(parametros):
+    # JSON no tiene tuplas: hidden_layer_sizes vuelve como lista
+    return {clave: tuple(valor) if isinstance(valor, list) else valor
+            for clave, valor in parametros.items()}
+
+
+def parametros_vigentes(modelo, hiper=HIPERPARAMETROS):
+    """Parámetros del estimador "rf" o "mlp" que arma construir_modelos hoy, incluidos los por omisión."""
+    estimador = construir_modelos(hiper, n_jobs=1)[_INDICE_MODELO[modelo]]
+    # La MLP va dentro de un Pipeline: sus parámetros son los del último paso
+    if hasattr(estimador, "steps"):
+        estimador = estimador.steps[-1][1]
+    return estimador.get_params()
+
+
+def _candidatos(espacio, cantidad, conocidos, semilla, completar=None):
+    """
+    Hasta `cantidad` combinaciones: primero las conocidas, luego al azar del
+    espacio. A una conocida a la que le falten claves del espacio se le
+    completan con `completar` (p. ej. parametros_vigentes); si aun así le
+    faltan, se descarta.
+    """
+    claves = list(espacio)
+    todas = [dict(zip(claves, valores)) for valores in itertools.product(*espacio.values())]
+    elegidos = []
+    for parametros in conocidos:
+        parametros = {**(completar or {}), **parametros}
+        parametros = {c: parametros[c] for c in claves if c in parametros}
+        if len(parametros) == len(claves) and parametros not in elegidos:
+            elegidos.append(parametros)
+    azar = np.random.default_rng(semilla)
+    for i in azar.permutation(len(todas)):
+        if len(elegidos) >= cantidad:
+            break
+        if todas[i] not in elegidos:
+            elegidos.append(todas[i])
+    return elegidos
+
+
+def _ensayo(tarea, X_train, y_train, X_val, y_val, hiper, limite):
+    modelo, parametros, filas = tarea
+    if time.monotonic() >= limite:
+        return None
+    variante = {**hiper, modelo: {**hiper[modelo], **parametros}}
+    estimador = construir_modelos(variante, n_jobs=1)[_INDICE_MODELO[modelo]]
+    inicio = time.perf_counter()
+    estimador.fit(X_train[:filas], y_train[:filas])
+    prediccion = estimador.predict(X_val)
+    return {
+        "modelo": modelo,
+        "parametros": parametros,
+        "filas": filas,
+        "RMSE": float(np.sqrt(np.mean((y_val - prediccion) ** 2))),
+        "segundos": time.perf_counter() - inicio,
+    }
+
+
+def reduccion_sucesiva(X, y, modelo, espacio, hiper=HIPERPARAMETROS, conocidos=(),
+                       presupuesto_s=PRESUPUESTO_S, candidatos=CANDIDATOS, eta=ETA, hilos=None):
+    """
+    Successive halving de un modelo ("rf" o "mlp") sobre una partición
+    entrenamiento / validación fija. Devuelve (mejores parámetros, ensayos,
+    completa); completa es False si el presupuesto se agotó antes de la
+    última ronda. Los parámetros conocidos (p. ej. los actuales) siempre
+    son candidatos.
+    """
+    train_test_split = importar("sklearn.model_selection").train_test_split
+    X_train, X_val, y_train, y_val = train_test_split(
+        X, y, test_size=hiper["test_size"], random_state=hiper["random_state"])
+
+    vivos = _candidatos(espacio, candidatos, conocidos, hiper["random_state"],
+                        parametros_vigentes(modelo, hiper))
+    rondas = max(1, math.ceil(math.log(len(vivos), eta))) if len(vivos) > 1 else 1
+    limite = time.monotonic() + presupuesto_s
+    ensayos, mejor, completa = [], vivos[0], True
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        for ronda in range(rondas):
+            restantes = rondas - 1 - ronda
+            filas = max(min(FILAS_MINIMAS, len(X_train)), int(len(X_train) / eta ** restantes))
+            tareas = [(modelo, parametros, filas) for parametros in vivos]
+            ensayar = partial(_ensayo, X_train=X_train, y_train=y_train,
+                              X_val=X_val, y_val=y_val, hiper=hiper, limite=limite)
+            resultados = list(pool.map(ensayar, tareas))
+            hechos = [r for r in resultados if r is not None]
+            for r in hechos:
+                r["ronda"] = ronda + 1
+            ensayos += hechos
+            if len(hechos) < len(tareas):
+                # Presupuesto agotado: gana el mejor de la última ronda completa
+                completa = False
+                break
+            hechos.sort(key=lambda r: r["RMSE"])
+            mejor = hechos[0]["parametros"]
+            vivos = [r["parametros"] for r in hechos[:max(1, math.ceil(len(hechos) / eta))]]
+    return mejor, ensayos, completa
+
+
+def buscar_hiperparametros(X, y, hiper=HIPERPARAMETROS, espacios=ESPACIOS,
+                           presupuesto_s=PRESUPUESTO_S, candidatos=CANDIDATOS, eta=ETA, hilos=None):
+    """
+    Busca los hiperparámetros de RF y MLP (ver reduccion_sucesiva), con el
+    presupuesto repartido entre los dos modelos.
+
+    Devuelve (hiper con los mejores rf/mlp, DataFrame de ensayos, si vino de
+    la caché). Con los mismos datos y espacio no se vuelve a entrenar nada,
+    salvo que la búsqueda guardada haya quedado incompleta y ahora haya más
+    presupuesto: entonces se repite (solo para los modelos incompletos) con
+    sus mejores parámetros como candidatos.
+    """
+    firma = firma_espacio(espacios, candidatos, eta)
+    clave = f"{huella_datos(X, y)}-{firma}"
+    busquedas = _leer_busquedas()
+
+    guardada = busquedas["resultados"].get(clave)
+    # Búsquedas guardadas sin la marca de completas cuentan como incompletas
+    completas = (guardada or {}).get("completas", {})
+    pendientes = [modelo for modelo in espacios if not completas.get(modelo)]
+    if guardada is None or (pendientes and presupuesto_s > guardada.get("presupuesto_s", 0)):
+        mejores = dict((guardada or {}).get("mejores", {}))
+        ensayos = [e for e in (guardada or {}).get("ensayos", []) if e["modelo"] not in pendientes]
+        completas = {modelo: completas.get(modelo, False) for modelo in espacios}
+        for modelo in pendientes:
+            conocidos = [hiper[modelo]]
+            anterior = busquedas["mejores"].get(firma, {}).get(modelo)
+            if anterior is not None:
+                conocidos.insert(0, _desde_json(anterior))
+            if modelo in mejores:
+                conocidos.insert(0, _desde_json(mejores[modelo]))
+            mejores[modelo], ensayos_modelo, completas[modelo] = reduccion_sucesiva(
+                X, y, modelo, espacios[modelo], hiper, conocidos,
+                presupuesto_s / len(pendientes), candidatos, eta, hilos)
+            ensayos += ensayos_modelo
+        guardada = {"mejores": mejores, "ensayos": ensayos, "completas": completas,
+                    "presupuesto_s": presupuesto_s}
+        # Al final del orden de inserción: el recorte descarta las más antiguas
+        busquedas["resultados"].pop(clave, None)
+        busquedas["resultados"][clave] = guardada
+        for vieja in list(busquedas["resultados"])[:-MAX_BUSQUEDAS]:
+            del busquedas["resultados"][vieja]
+        busquedas["mejores"][firma] = mejores
+        _guardar_busquedas(json.loads(json.dumps(busquedas, default=list)))
+        desde_cache = False
+    else:
+        desde_cache = True
+
+    nuevo = dict(hiper)
+    for modelo, parametros in guardada["mejores"].items():
+        nuevo[modelo] = {**hiper[modelo], **_desde_json(parametros)}
+
+    df_ensayos = pd.DataFrame([
+        {"Modelo": NOMBRES[_INDICE_MODELO[e["modelo"]]], "Ronda": e["ronda"], "Filas": e["filas"],
+         "Parámetros": ", ".join(f"{k}={v}" for k, v in _desde_json(e["parametros"]).items()),
+         "RMSE validación": e["RMSE"], "Segundos": e["segundos"]}
+        for e in guardada["ensayos"]
+    ])
+    return nuevo, df_ensayos, desde_cache
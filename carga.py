@@ -0,0 +1,149 @@
+"""
+Carga de los CSV de leyes (sulfuros.csv, mixto.csv) con caché columnar.
+
+El CSV se parsea una sola vez; el resultado tipado se guarda en Parquet
+dentro de .cache_leyes/ junto al archivo original, con la fecha de
+modificación y el tamaño del CSV en el nombre. Mientras el CSV no cambie,
+las siguientes cargas leen el Parquet directamente.
+
+Para archivos que no caben en memoria, sumas_por_bloques lee el CSV por
+bloques de filas y reduce cada bloque a sus sumas por banda.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from leyes import sumas_por_banda, sumas_vacias
+
+DIRECTORIO_CACHE = ".cache_leyes"
+
+COLUMNAS_REQUERIDAS = ['TMH', 'TMS', '%Cu', 'Au g/TM', 'Ag g/TM']
+FILAS_POR_BLOQUE = 200_000
+
+COLUMNAS_LEY = ['%Cu', 'Au g/TM', 'Ag g/TM']
+COLUMNAS_TONELAJE = ['TMH', 'TMS']
+FORMATO_FECHA = "%d/%m/%Y"
+
+
+# Última huella por ruta junto con el (mtime, tamaño) con que se calculó: el
+# contenido solo se vuelve a leer cuando el archivo cambia
+_huellas = {}
+
+
+def version_archivo(ruta):
+    """
+    (mtime en ns, tamaño) del archivo: clave de caché que no lee el
+    contenido. Sirve para archivos que solo crecen o que se leen por
+    bloques, donde hashear todo el archivo anularía la lectura parcial.
+    """
+    info = os.stat(ruta)
+    return info.st_mtime_ns, info.st_size
+
+
+def huella_archivo(ruta):
+    """Hash SHA-1 del contenido del archivo, para usar como clave de caché."""
+    info = os.stat(ruta)
+    ruta_abs = os.path.abspath(ruta)
+    version = (info.st_mtime_ns, info.st_size)
+    guardada = _huellas.get(ruta_abs)
+    if guardada is None or guardada[0] != version:
+        h = hashlib.sha1()
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloque)
+        guardada = _huellas[ruta_abs] = (version, h.hexdigest())
+    return guardada[1]
+
+
+def tipar_columnas(df):
+    """Leyes en float32, TIPO DE MINERAL como categoría y FECHA como fecha."""
+    for col in COLUMNAS_LEY:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+    for col in COLUMNAS_TONELAJE:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    if 'TIPO DE MINERAL' in df.columns:
+        df['TIPO DE MINERAL'] = df['TIPO DE MINERAL'].astype('category')
+    if 'FECHA' in df.columns:
+        df['FECHA'] = pd.to_datetime(df['FECHA'], format=FORMATO_FECHA, errors='coerce')
+    return df
+
+
+def parsear_csv(ruta):
+    """Lee el CSV separado por ';' y descarta las columnas vacías del ';;;' final."""
+    return tipar_columnas(pd.read_csv(ruta, sep=';').dropna(axis=1, how='all'))
+
+
+def ruta_cache(ruta):
+    """Ruta del Parquet asociado a la versión actual (mtime + tamaño) del CSV."""
+    info = os.stat(ruta)
+    carpeta = os.path.join(os.path.dirname(os.path.abspath(ruta)), DIRECTORIO_CACHE)
+    nombre = f"{os.path.basename(ruta)}.{info.st_mtime_ns}-{info.st_size}.parquet"
+    return os.path.join(carpeta, nombre)
+
+
+def _limpiar_versiones_antiguas(ruta, vigente):
+    carpeta = os.path.dirname(vigente)
+    prefijo = os.path.basename(ruta) + "."
+    for nombre in os.listdir(carpeta):
+        completo = os.path.join(carpeta, nombre)
+        if nombre.startswith(prefijo) and nombre.endswith(".parquet") and completo != vigente:
+            try:
+                os.remove(completo)
+            except OSError:
+                pass
+
+
+def leer_csv_leyes(ruta, usar_cache=True):
+    """
+    Devuelve el DataFrame tipado del CSV de leyes. Lanza FileNotFoundError si
+    el CSV no existe. Si no se puede leer o escribir la caché (sin pyarrow,
+    carpeta de solo lectura) se parsea el CSV como siempre.
+    """
+    cache = ruta_cache(ruta)
+    if usar_cache and os.path.exists(cache):
+        try:
+            return pd.read_parquet(cache)
+        except (ImportError, OSError, ValueError):
+            pass
+
+    df = parsear_csv(ruta)
+
+    if usar_cache:
+        try:
+            os.makedirs(os.path.dirname(cache), exist_ok=True)
+            temporal = f"{cache}.{os.getpid()}.tmp"
+            df.to_parquet(temporal, index=False)
+            os.replace(temporal, cache)
+            _limpiar_versiones_antiguas(ruta, cache)
+        except (ImportError, OSError, ValueError):
+            pass
+    return df
+
+
+def verificar_cabecera(ruta, columnas=COLUMNAS_REQUERIDAS):
+    """Lanza ValueError si la cabecera del CSV no tiene todas las columnas indicadas."""
+    with open(ruta, "rb") as f:
+        cabecera = f.readline().decode("utf-8-sig").strip().split(";")
+    faltantes = [c for c in columnas if c not in cabecera]
+    if faltantes:
+        raise ValueError(f"El archivo no contiene las columnas {faltantes}.")
+
+
+def sumas_por_bloques(ruta, esquema, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Sumas por banda (ver leyes.sumas_por_banda) de un CSV leído por bloques.
+
+    Solo se mantienen en memoria las columnas necesarias de un bloque y la
+    matriz de sumas acumulada, sea cual sea el tamaño del archivo.
+    """
+    verificar_cabecera(ruta)
+    sumas = sumas_vacias(esquema)
+    bloques = pd.read_csv(ruta, sep=';', usecols=COLUMNAS_REQUERIDAS, chunksize=filas_por_bloque)
+    for bloque in bloques:
+        sumas += sumas_por_banda(tipar_columnas(bloque), esquema)
+    return sumas
@@ -0,0 +1,109 @@
+"""
+Predicción "compilada": cada modelo ajustado se tabula una vez sobre
+malla_200 y las consultas se responden con búsqueda binaria o
+interpolación en la tabla, sin recorrer los árboles ni la red.
+
+- Random Forest: la predicción es constante entre umbrales de corte
+  consecutivos de sus árboles, así que con un valor por tramo la tabla es
+  exacta en toda la recta (búsqueda binaria sobre los umbrales) y el
+  bosque ya no hace falta.
+- Lineal, polinomial y MLP: curva suave, tabulada en una grilla densa
+  sobre el rango de entrenamiento e interpolada linealmente. Los valores
+  fuera de ese rango (pocos) se delegan al modelo original.
+
+Al compilar se mide el error máximo contra el modelo original en una
+grilla de verificación más densa que la tabla.
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from modelos import NOMBRES
+
+PUNTOS = 4097
+# Verificación: esta cantidad de puntos por cada intervalo de la tabla
+DENSIDAD_VERIFICACION = 8
+
+
+def _umbrales_bosque(modelo):
+    """Umbrales de corte distintos de todos los árboles, o None si no es un bosque de árboles."""
+    arboles = getattr(modelo, "estimators_", None)
+    if arboles is None or not all(hasattr(a, "tree_") for a in arboles):
+        return None
+    umbrales = [a.tree_.threshold[a.tree_.feature >= 0] for a in arboles]
+    return np.unique(np.concatenate(umbrales)) if umbrales else np.array([])
+
+
+class ModeloTabulado:
+    """
+    Sustituto tabulado de un modelo de una variable con la interfaz predict(X).
+
+    modo "escalones": valores[j] es la predicción para x en (umbrales[j-1],
+    umbrales[j]] (árboles: x <= umbral va a la izquierda). modo
+    "interpolación": valores en la grilla de [desde, hasta], interpolados
+    linealmente; fuera de la grilla predice `modelo`.
+    """
+
+    def __init__(self, modelo, desde, hasta, puntos=PUNTOS):
+        self.desde, self.hasta = float(desde), float(hasta)
+        umbrales = _umbrales_bosque(modelo)
+        self.modelo = None
+        if umbrales is not None and len(umbrales):
+            self.modo = "escalones"
+            self.nodos = umbrales
+            # Un punto por tramo: antes del primer umbral, los puntos medios y después del último
+            representantes = np.concatenate([umbrales[:1] - 1, (umbrales[:-1] + umbrales[1:]) / 2,
+                                             umbrales[-1:] + 1])
+        else:
+            self.modo = "interpolación"
+            self.modelo = modelo
+            self.nodos = np.linspace(self.desde, self.hasta, puntos)
+            representantes = self.nodos
+        self.valores = np.asarray(modelo.predict(representantes.reshape(-1, 1)), dtype=float)
+        self.error_maximo = self._verificar(modelo)
+
+    def predict(self, X):
+        x = np.asarray(X, dtype=float).reshape(len(X), -1)[:, 0]
+        if self.modo == "escalones":
+            j = np.searchsorted(self.nodos, x.astype(np.float32).astype(float), side="left")
+            return self.valores[j]
+        prediccion = np.interp(x, self.nodos, self.valores)
+        fuera = (x < self.desde) | (x > self.hasta)
+        if fuera.any():
+            prediccion[fuera] = self.modelo.predict(x[fuera].reshape(-1, 1))
+        return prediccion
+
+    def _verificar(self, modelo):
+        if self.modo == "escalones":
+            n = max(len(self.nodos), PUNTOS) * DENSIDAD_VERIFICACION
+        else:
+            n = (len(self.nodos) - 1) * DENSIDAD_VERIFICACION + 1
+        # Desplazada para no coincidir con los nodos de la tabla
+        x = np.linspace(self.desde, self.hasta, n)
+        x[1:-1] += (x[1] - x[0]) / 3
+        x = np.concatenate([x, self.nodos[(self.nodos >= self.desde) & (self.nodos <= self.hasta)]])
+        X = x.reshape(-1, 1)
+        return float(np.max(np.abs(self.predict(X) - modelo.predict(X))))
+
+    @property
+    def bytes(self):
+        return self.nodos.nbytes + self.valores.nbytes
+
+
+def compilar(modelos, desde, hasta, puntos=PUNTOS):
+    """Lista de ModeloTabulado, en el mismo orden que modelos."""
+    return [ModeloTabulado(modelo, desde, hasta, puntos) for modelo in modelos]
+
+
+def tabla_compilados(modelos, compilados, nombres=NOMBRES):
+    """Modo, nodos, error máximo y tamaño de cada modelo compilado frente al original."""
+    return pd.DataFrame([{
+        "Modelo": nombre,
+        "Modo": c.modo,
+        "Nodos": len(c.nodos),
+        "Error máx. (%)": c.error_maximo,
+        "Tamaño tabla (KB)": c.bytes / 1024,
+        "Tamaño original (KB)": len(pickle.dumps(m)) / 1024,
+    } for nombre, m, c in zip(nombres, modelos, compilados)]).set_index("Modelo")
@@ -0,0 +1,197 @@
+"""
+Matrices de correlación por pares completos de todas las columnas
+numéricas (Pearson y Spearman, con el número de filas y el p-valor de
+cada par).
+
+En vez de recorrer los pares uno por uno, una sola pasada por bloques de
+filas acumula con productos de matrices las sumas que necesita cada par,
+contando solo las filas donde las dos columnas tienen dato:
+
+    n   = Mᵀ M      (filas con ambas columnas)
+    Sx  = Zᵀ M      (suma de x donde también hay y)
+    Sxx = (Z²)ᵀ M
+    Sxy = Zᵀ Z
+
+con M la máscara de datos presentes y Z los valores (0 donde falta). Cada
+columna se desplaza antes por su media del primer bloque para no perder
+precisión al restar.
+
+Spearman es Pearson sobre rangos. La misma pasada usa los rangos de cada
+columna sobre todos sus datos presentes, que son los del par solo si las
+dos columnas tienen el mismo patrón de faltantes. Los demás pares se
+recalculan con sus propios rangos: los valores de cada columna se agrupan
+una sola vez (np.unique) y el rango dentro de las filas del par sale de
+contar con bincount cuántas filas del par caen en cada grupo, sin volver
+a ordenar. Así Spearman también es exacto por pares completos, tenga el
+par las filas que tenga.
+"""
+
+import numpy as np
+import pandas as pd
+
+from importaciones import importar
+
+FILAS_POR_BLOQUE = 200_000
+# Pares con menos filas completas quedan sin correlación (NaN)
+MINIMO_FILAS = 3
+
+
+def _sumas(valores, filas_por_bloque):
+    k = valores.shape[1]
+    n = np.zeros((k, k))
+    sx = np.zeros((k, k))
+    sxx = np.zeros((k, k))
+    sxy = np.zeros((k, k))
+    desplazamiento = None
+    for inicio in range(0, len(valores), filas_por_bloque):
+        bloque = valores[inicio:inicio + filas_por_bloque]
+        presentes = ~np.isnan(bloque)
+        if desplazamiento is None:
+            with np.errstate(invalid="ignore"):
+                desplazamiento = np.nan_to_num(np.nanmean(bloque, axis=0)) if presentes.any() else np.zeros(k)
+        m = presentes.astype(float)
+        z = np.where(presentes, bloque - desplazamiento, 0.0)
+        n += m.T @ m
+        sx += z.T @ m
+        sxx += (z * z).T @ m
+        sxy += z.T @ z
+    return n, sx, sxx, sxy
+
+
+def _pearson(valores, minimo, filas_por_bloque):
+    n, sx, sxx, sxy = _sumas(valores, filas_por_bloque)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # sx[i, j]: suma de la columna i en las filas donde también hay j
+        cov = sxy - sx * sx.T / n
+        var_x = sxx - sx ** 2 / n
+        var_y = sxx.T - sx.T ** 2 / n
+        r = cov / np.sqrt(var_x * var_y)
+    r = np.clip(r, -1.0, 1.0)
+    r[(n < minimo) | (var_x <= 0) | (var_y <= 0)] = np.nan
+    np.fill_diagonal(r, np.where(np.diag(n) >= minimo, 1.0, np.nan))
+    return r, n
+
+
+def _grupos(valores):
+    """Por columna, el índice de cada fila en los valores distintos ordenados (-1 si falta) y cuántos hay."""
+    # Columnas contiguas: cada par lee dos columnas completas
+    grupos = np.full(valores.shape, -1, dtype=np.int32, order="F")
+    cantidades = []
+    for j in range(valores.shape[1]):
+        presentes = ~np.isnan(valores[:, j])
+        distintos, grupos[presentes, j] = np.unique(valores[presentes, j], return_inverse=True)
+        cantidades.append(len(distintos))
+    return grupos, cantidades
+
+
+def _rangos_en(grupos, cantidad):
+    """Rango promedio (empates incluidos) de cada fila dentro de las filas dadas, a partir de sus grupos."""
+    cuentas = np.bincount(grupos, minlength=cantidad)
+    return (np.cumsum(cuentas) - (cuentas - 1) / 2)[grupos]
+
+
+def _rangos(grupos, cantidades):
+    """Rangos de cada columna sobre todos sus datos presentes; NaN donde falta."""
+    rangos = np.full(grupos.shape, np.nan)
+    for j, cantidad in enumerate(cantidades):
+        presentes = grupos[:, j] >= 0
+        rangos[presentes, j] = _rangos_en(grupos[presentes, j], cantidad)
+    return rangos
+
+
+def _spearman_exacto(spearman, n, grupos, cantidades, minimo):
+    """
+    Recalcula in situ, con los rangos del par, los pares cuyas columnas no
+    tienen el mismo patrón de faltantes (ahí los rangos globales ya son los
+    del par). Los rangos de la columna i se calculan una vez por patrón de
+    faltantes de sus pares j, no una vez por par.
+    """
+    presentes = grupos >= 0
+    patrones = {}
+    for j in range(len(n)):
+        patrones.setdefault(presentes[:, j].tobytes(), []).append(j)
+    patron_de = {j: clave for clave, columnas in patrones.items() for j in columnas}
+
+    for i in range(len(n)):
+        pendientes = {}
+        for j in range(i + 1, len(n)):
+            if n[i, j] >= minimo and patron_de[i] != patron_de[j]:
+                pendientes.setdefault(patron_de[j], []).append(j)
+        for columnas in pendientes.values():
+            filas = presentes[:, i] & presentes[:, columnas[0]]
+            a = _rangos_en(grupos[filas, i], cantidades[i])
+            # Los rangos del par van de 1 a n: su media es (n + 1) / 2
+            a -= (len(a) + 1) / 2
+            for j in columnas:
+                b = _rangos_en(grupos[filas, j], cantidades[j]) - (len(a) + 1) / 2
+                denominador = np.sqrt((a @ a) * (b @ b))
+                spearman[i, j] = spearman[j, i] = (np.clip(a @ b / denominador, -1.0, 1.0)
+                                                   if denominador > 0 else np.nan)
+
+
+def p_valores(r, n):
+    """p-valor bilateral de r con n filas (prueba t con n - 2 grados de libertad)."""
+    stats = importar("scipy.stats")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gl = n - 2
+        t = r * np.sqrt(gl / np.maximum(1.0 - r ** 2, 1e-300))
+        p = 2 * stats.t.sf(np.abs(t), gl)
+    return np.where((gl > 0) & ~np.isnan(r), p, np.nan)
+
+
+def matrices_correlacion(df, columnas=None, minimo=MINIMO_FILAS, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Pearson y Spearman por pares completos de `columnas` (por defecto, las
+    numéricas de df). Devuelve un dict de DataFrames k × k: "pearson",
+    "p_pearson", "spearman", "p_spearman" y "n" (filas completas del par).
+    """
+    if columnas is None:
+        columnas = list(df.select_dtypes("number").columns)
+    valores = df[list(columnas)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+    pearson, n = _pearson(valores, minimo, filas_por_bloque)
+    grupos, cantidades = _grupos(valores)
+    spearman, _ = _pearson(_rangos(grupos, cantidades), minimo, filas_por_bloque)
+    _spearman_exacto(spearman, n, grupos, cantidades, minimo)
+
+    def marco(matriz):
+        return pd.DataFrame(matriz, index=columnas, columns=columnas)
+
+    return {
+        "pearson": marco(pearson),
+        "p_pearson": marco(p_valores(pearson, n)),
+        "spearman": marco(spearman),
+        "p_spearman": marco(p_valores(spearman, n)),
+        "n": marco(n.astype(np.int64)),
+    }
+
+
+def tabla_pares(matrices):
+    """Un renglón por par (sin repetir ni la diagonal), ordenado por |Pearson|."""
+    columnas = list(matrices["pearson"].columns)
+    i, j = np.triu_indices(len(columnas), k=1)
+    tabla = pd.DataFrame({
+        "X": [columnas[a] for a in i],
+        "Y": [columnas[b] for b in j],
+        "n": matrices["n"].to_numpy()[i, j],
+        "Pearson": matrices["pearson"].to_numpy()[i, j],
+        "p Pearson": matrices["p_pearson"].to_numpy()[i, j],
+        "Spearman": matrices["spearman"].to_numpy()[i, j],
+        "p Spearman": matrices["p_spearman"].to_numpy()[i, j],
+    })
+    orden = tabla["Pearson"].abs().sort_values(ascending=False, na_position="last").index
+    return tabla.loc[orden].reset_index(drop=True)
+
+
+def detalle_par(df, columna_x, columna_y):
+    """Filas completas del par y sus correlaciones exactas: (datos, dict de estadísticos)."""
+    stats = importar("scipy.stats")
+    datos = df[[columna_x, columna_y]].apply(pd.to_numeric, errors="coerce").dropna()
+    resultado = {"n": len(datos)}
+    x, y = datos.iloc[:, 0], datos.iloc[:, 1]
+    if len(datos) >= MINIMO_FILAS and x.nunique() > 1 and y.nunique() > 1:
+        resultado["Pearson"], resultado["p Pearson"] = stats.pearsonr(x, y)
+        resultado["Spearman"], resultado["p Spearman"] = stats.spearmanr(x, y)
+        regresion = stats.linregress(x, y)
+        resultado["pendiente"], resultado["intercepto"] = regresion.slope, regresion.intercept
+    return datos, resultado
@@ -0,0 +1,101 @@
+"""
+Bosquejo de cuantiles aproximados (tipo KLL) para el filtro IQR.
+
+El bosquejo recibe los valores por bloques, ocupa memoria acotada sin
+importar cuántas filas se agreguen y se puede combinar con otros bosquejos
+(de otros archivos o de otros procesos), así que los cuartiles de todo el
+histórico se obtienen sin tener las columnas completas en memoria.
+
+Mientras el total de valores no supera la capacidad del primer nivel el
+bosquejo guarda todo y los cuantiles son exactos (iguales a
+pandas.Series.quantile).
+"""
+
+import math
+
+import numpy as np
+
+# Error de rango de KLL ≈ 1.65 / k; se usa una constante algo mayor como margen
+_CONSTANTE_ERROR = 2.0
+
+
+class BosquejoCuantiles:
+    """
+    Compactadores por nivel: un valor en el nivel h representa 2**h valores
+    originales. Cuando un nivel se llena se ordena y la mitad de sus valores
+    (pares o impares, al azar) sube al nivel siguiente.
+
+    error es el error de rango tolerado como fracción de n (0.005 = medio
+    percentil); un error menor usa más memoria. semilla fija el azar de la
+    compactación para que el resultado sea reproducible.
+    """
+
+    def __init__(self, error=0.005, semilla=0):
+        self.error = error
+        self.k = max(8, math.ceil(_CONSTANTE_ERROR / error))
+        self.n = 0
+        self._niveles = [np.empty(0)]
+        self._azar = np.random.default_rng(semilla)
+
+    def _capacidad(self, nivel):
+        altura = len(self._niveles)
+        return max(2, math.ceil(self.k * (2 / 3) ** (altura - 1 - nivel)))
+
+    def _compactar(self):
+        nivel = 0
+        while nivel < len(self._niveles):
+            valores = self._niveles[nivel]
+            if len(valores) >= self._capacidad(nivel):
+                if nivel + 1 == len(self._niveles):
+                    self._niveles.append(np.empty(0))
+                valores = np.sort(valores)
+                # Si la cantidad es impar, el mayor se queda en este nivel
+                resto = valores[len(valores) - len(valores) % 2:]
+                suben = valores[:len(valores) - len(resto)][self._azar.integers(2)::2]
+                self._niveles[nivel] = resto
+                self._niveles[nivel + 1] = np.concatenate([self._niveles[nivel + 1], suben])
+            nivel += 1
+
+    def agregar(self, valores):
+        """Agrega un bloque de valores (se ignoran los NaN). Devuelve el bosquejo."""
+        valores = np.asarray(valores, dtype=float).ravel()
+        valores = valores[~np.isnan(valores)]
+        if len(valores):
+            self.n += len(valores)
+            self._niveles[0] = np.concatenate([self._niveles[0], valores])
+            self._compactar()
+        return self
+
+    def combinar(self, otro):
+        """Suma a este bosquejo los valores resumidos en otro. Devuelve el bosquejo."""
+        for nivel, valores in enumerate(otro._niveles):
+            if nivel == len(self._niveles):
+                self._niveles.append(np.empty(0))
+            self._niveles[nivel] = np.concatenate([self._niveles[nivel], valores])
+        self.n += otro.n
+        self._compactar()
+        return self
+
+    def cuantil(self, q):
+        """Cuantil(es) q en [0, 1] con interpolación lineal, como pandas.Series.quantile."""
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        valores = np.concatenate(self._niveles)
+        pesos = np.concatenate([np.full(len(v), 2.0 ** h) for h, v in enumerate(self._niveles)])
+        orden = np.argsort(valores, kind="stable")
+        valores, pesos = valores[orden], pesos[orden]
+        # Rango central de cada valor (0 .. n-1); sin compactar son 0, 1, 2, ...
+        rangos = np.cumsum(pesos) - pesos + (pesos - 1) / 2
+        total = pesos.sum()
+        return np.interp(np.asarray(q) * (total - 1), rangos, valores)
+
+    def __len__(self):
+        """Valores guardados (memoria usada), no los valores resumidos (ver n)."""
+        return sum(len(v) for v in self._niveles)
+
+
+def limites_iqr(bosquejo, factor=1.5):
+    """(límite inferior, límite superior) de la regla Q1 - f·IQR, Q3 + f·IQR."""
+    q1, q3 = bosquejo.cuantil([0.25, 0.75])
+    iqr = q3 - q1
+    return q1 - factor * iqr, q3 + factor * iqr
@@ -0,0 +1,253 @@
+"""
+Caché de gráficos renderizados para los tableros de Streamlit.
+
+Cada gráfico se identifica por una huella de sus datos de entrada, su
+estilo y la función que lo dibuja. La primera vez se dibuja con matplotlib
+y se guardan los bytes de la imagen (PNG o SVG); mientras los datos y el
+estilo no cambien, las siguientes ejecuciones reciben esos bytes sin tocar
+matplotlib. La caché vive en el proceso (compartida entre sesiones y
+reejecuciones), se limita a MAX_ENTRADAS gráficos (se descarta el menos
+usado) y lleva contadores de aciertos y fallos.
+
+También reúne utilidades de dibujo comunes a los tableros y a los scripts
+(dispersión con modo densidad, reducción de series de tiempo a un número
+fijo de puntos, gráfico de pastel).
+"""
+
+import hashlib
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.colors import LinearSegmentedColormap, LogNorm, to_rgba
+
+MAX_ENTRADAS = 64
+DPI = 200
+
+# Dispersión: por encima de este número de filas se dibuja la densidad
+# (conteos en CELDAS_DENSIDAD × CELDAS_DENSIDAD celdas) en vez de un punto por fila
+UMBRAL_DENSIDAD = 20_000
+CELDAS_DENSIDAD = 150
+
+# Series de tiempo: puntos por serie después de la reducción
+PUNTOS_SERIE = 2000
+
+
+def _actualizar(h, parte):
+    if isinstance(parte, (pd.DataFrame, pd.Series, pd.Index)):
+        h.update(pd.util.hash_pandas_object(parte, index=True).to_numpy().tobytes())
+        nombres = parte.columns if isinstance(parte, pd.DataFrame) else [parte.name]
+        h.update(json.dumps([str(n) for n in nombres]).encode("utf-8"))
+    elif isinstance(parte, np.ndarray):
+        h.update(f"{parte.dtype}{parte.shape}".encode("utf-8"))
+        h.update(np.ascontiguousarray(parte).tobytes())
+    elif isinstance(parte, (list, tuple)):
+        h.update(b"[")
+        for elemento in parte:
+            _actualizar(h, elemento)
+        h.update(b"]")
+    else:
+        h.update(json.dumps(parte, sort_keys=True, default=str).encode("utf-8"))
+    h.update(b"|")
+
+
+def huella_grafico(*partes):
+    """Huella de los datos y el estilo de un gráfico (arreglos, Series, DataFrames, dicts, escalares)."""
+    h = hashlib.sha1()
+    for parte in partes:
+        _actualizar(h, parte)
+    return h.hexdigest()
+
+
+class CacheGraficos:
+    """Bytes de imagen por huella, con descarte LRU y contadores de aciertos / fallos."""
+
+    def __init__(self, max_entradas=MAX_ENTRADAS):
+        self.max_entradas = max_entradas
+        self._imagenes = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.segundos_dibujo = 0.0
+
+    def obtener(self, clave, dibujar, formato="png", dpi=DPI):
+        """Imagen guardada para `clave`; si no hay, la genera con dibujar() -> Figure."""
+        with self._candado:
+            if clave in self._imagenes:
+                self._imagenes.move_to_end(clave)
+                self.aciertos += 1
+                return self._imagenes[clave]
+
+        inicio = time.perf_counter()
+        fig = dibujar()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=formato, dpi=dpi, bbox_inches="tight")
+        plt.close(fig)
+        imagen = buffer.getvalue()
+
+        with self._candado:
+            self.fallos += 1
+            self.segundos_dibujo += time.perf_counter() - inicio
+            self._imagenes[clave] = imagen
+            while len(self._imagenes) > self.max_entradas:
+                self._imagenes.popitem(last=False)
+        return imagen
+
+    def estadisticas(self):
+        """Aciertos, fallos, tasa de aciertos, entradas, KB guardados y tiempo de dibujo ahorrado."""
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            medio = self.segundos_dibujo / self.fallos if self.fallos else 0.0
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else None,
+                "entradas": len(self._imagenes),
+                "kb": sum(len(imagen) for imagen in self._imagenes.values()) / 1024,
+                "segundos_ahorrados": self.aciertos * medio,
+            }
+
+    def limpiar(self):
+        with self._candado:
+            self._imagenes.clear()
+
+
+CACHE = CacheGraficos()
+
+
+def grafico(dibujar, *partes, formato="png", dpi=DPI, cache=CACHE):
+    """
+    Bytes de la imagen de dibujar(*partes). La clave es la función más la
+    huella de `partes`, así que dibujar debe depender solo de sus argumentos.
+    """
+    clave = huella_grafico(dibujar.__module__, dibujar.__qualname__, formato, dpi, *partes)
+    return cache.obtener(clave, lambda: dibujar(*partes), formato, dpi)
+
+
+def reporte_cache(cache=CACHE):
+    """Resumen de una línea de los contadores de la caché."""
+    e = cache.estadisticas()
+    tasa = f"{e['tasa_aciertos']:.0%}" if e["tasa_aciertos"] is not None else "—"
+    return (f"Caché de gráficos: {e['aciertos']} aciertos / {e['fallos']} fallos ({tasa}) · "
+            f"{e['entradas']} gráficos, {e['kb']:.0f} KB · "
+            f"{e['segundos_ahorrados']:.2f} s de dibujo ahorrados")
+
+
+def dispersion(ax, x, y, color, alpha=0.4, s=14, zorder=3, label=None,
+               umbral=UMBRAL_DENSIDAD, celdas=CELDAS_DENSIDAD):
+    """
+    Dispersión de y contra x. Con más de `umbral` filas dibuja un ráster
+    de conteos por celda (escala logarítmica, del color tenue al pleno) con
+    su barra de color: el costo de dibujo y el tamaño de la imagen dependen
+    de las celdas, no de las filas. Lo que se dibuje encima (rectas,
+    curvas) no cambia.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) <= umbral:
+        return ax.scatter(x, y, color=color, alpha=alpha, edgecolors="none", s=s,
+                          zorder=zorder, label=label)
+
+    conteos, bordes_x, bordes_y = np.histogram2d(x, y, bins=celdas)
+    conteos = np.ma.masked_equal(conteos.T, 0)
+    mapa = LinearSegmentedColormap.from_list("densidad", [to_rgba(color, 0.15), to_rgba(color, 1.0)])
+    imagen = ax.imshow(conteos, extent=(bordes_x[0], bordes_x[-1], bordes_y[0], bordes_y[-1]),
+                       origin="lower", aspect="auto", interpolation="nearest", cmap=mapa,
+                       norm=LogNorm(vmin=1, vmax=max(conteos.max(), 1)), zorder=zorder)
+    ax.figure.colorbar(imagen, ax=ax, pad=0.01, label="Filas por celda")
+    if label is not None:
+        # imshow no aparece en la leyenda
+        ax.scatter([], [], color=color, marker="s", s=s, label=f"{label} (densidad)")
+    return imagen
+
+
+def indices_lttb(x, y, puntos):
+    """
+    Índices de los `puntos` elegidos por Largest-Triangle-Three-Buckets:
+    primero y último fijos, y en cada tramo intermedio el punto que forma
+    el triángulo de mayor área con el elegido antes y el promedio del
+    tramo siguiente. Conserva picos y valles. x debe estar ordenado.
+    """
+    n = len(x)
+    if puntos >= n or puntos < 3:
+        return np.arange(n)
+    bordes = np.linspace(1, n - 1, puntos - 1).astype(np.int64)
+    indices = np.empty(puntos, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(puntos - 2):
+        desde, hasta = bordes[i], bordes[i + 1]
+        siguiente_hasta = bordes[i + 2] if i + 2 < len(bordes) else n
+        mx = x[hasta:siguiente_hasta].mean()
+        my = y[hasta:siguiente_hasta].mean()
+        areas = np.abs((x[a] - mx) * (y[desde:hasta] - y[a])
+                       - (x[a] - x[desde:hasta]) * (my - y[a]))
+        a = desde + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+
+def indices_minmax(y, puntos):
+    """Índices del mínimo y el máximo de cada uno de puntos / 2 tramos, en orden."""
+    n = len(y)
+    if puntos >= n or puntos < 2:
+        return np.arange(n)
+    tramos = puntos // 2
+    largo = -(-n // tramos)
+    # Tramos de igual largo; el relleno del último nunca gana
+    relleno = np.full(tramos * largo, np.inf)
+    relleno[:n] = y
+    minimos = np.argmin(relleno.reshape(tramos, largo), axis=1)
+    relleno[n:] = -np.inf
+    maximos = np.argmax(relleno.reshape(tramos, largo), axis=1)
+    base = np.arange(tramos) * largo
+    indices = np.concatenate([base + minimos, base + maximos])
+    return np.unique(indices[indices < n])
+
+
+def reducir_serie(x, y, puntos=PUNTOS_SERIE, metodo="lttb"):
+    """
+    (x, y) reducidos a lo sumo a `puntos` puntos con "lttb" o "minmax",
+    sin los NaN de y. x puede ser de fechas (datetime64); se ordena si hace falta.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    validos = ~np.isnan(y)
+    if np.issubdtype(x.dtype, np.datetime64):
+        validos &= ~np.isnat(x)
+    x, y = x[validos], y[validos]
+    orden = np.argsort(x, kind="stable")
+    x, y = x[orden], y[orden]
+    if metodo == "minmax":
+        indices = indices_minmax(y, puntos)
+    else:
+        indices = indices_lttb(x.astype(np.int64) if np.issubdtype(x.dtype, np.datetime64)
+                               else x.astype(float), y, puntos)
+    return x[indices], y[indices]
+
+
+def figura_pastel(valores, etiquetas, figsize=(2, 1), fontsize=3):
+    """
+    Gráfico de pastel de toneladas por categoría de los análisis de leyes.
+    figsize y fontsize en None dejan los valores por omisión de matplotlib.
+    """
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.pie(
+        valores,
+        labels=etiquetas,
+        autopct='%1.1f%%',
+        startangle=90,
+        textprops=None if fontsize is None else {'fontsize': fontsize}
+    )
+    ax.axis('equal')
+    return fig
+
+
+def grafico_pastel(valores, etiquetas, figsize=(2, 1), fontsize=3):
+    """PNG del gráfico de pastel; matplotlib solo se usa si cambian los valores o el estilo."""
+    return grafico(figura_pastel, tuple(valores), tuple(etiquetas), figsize, fontsize)
@@ -0,0 +1,102 @@
+"""
+Importación diferida de las librerías pesadas (scipy, sklearn)
+y registro del tiempo de importación por módulo.
+
+Las apps importan al inicio solo lo necesario para mostrar la interfaz; los
+módulos de modelado se importan con importar() en la etapa que los usa, o
+se precalientan en un hilo mientras el usuario sube el archivo. Los tiempos
+medidos en frío quedan en TIEMPOS para seguir la latencia de arranque del
+contenedor entre despliegues.
+"""
+
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+MODULOS_PESADOS = (
+    "scipy.stats",
+    "sklearn.linear_model",
+    "sklearn.preprocessing",
+    "sklearn.ensemble",
+    "sklearn.neural_network",
+    "sklearn.model_selection",
+    "sklearn.metrics",
+    "sklearn.pipeline",
+)
+
+# {módulo o grupo: segundos de la primera importación en este proceso}
+TIEMPOS = {}
+
+_candado = threading.Lock()
+# Serializa los imports pesados entre el hilo de precalentado y la app: dos
+# hilos importando a la vez paquetes con imports circulares (sklearn) pueden
+# provocar un _DeadlockError del sistema de importación
+_candado_importar = threading.RLock()
+_hilo_precalentado = None
+
+
+def _registrar(nombre, segundos):
+    with _candado:
+        TIEMPOS.setdefault(nombre, segundos)
+
+
+@contextmanager
+def cronometro(nombre):
+    """Mide un bloque de imports; solo cuenta la primera vez (en frío)."""
+    inicio = time.perf_counter()
+    yield
+    _registrar(nombre, time.perf_counter() - inicio)
+
+
+def importar(nombre):
+    """importlib.import_module registrando cuánto tardó la primera importación."""
+    # Bajo el candado: un módulo que el otro hilo está importando ya figura
+    # en sys.modules, pero a medio inicializar
+    with _candado_importar:
+        modulo = sys.modules.get(nombre)
+        if modulo is not None:
+            return modulo
+        with cronometro(nombre):
+            return importlib.import_module(nombre)
+
+
+def _importar_todos(modulos, informar):
+    inicio = time.perf_counter()
+    for nombre in modulos:
+        try:
+            importar(nombre)
+        except Exception:
+            pass  # la etapa que lo necesite lo vuelve a importar y muestra el error
+    if informar:
+        print(f"[arranque] módulos pesados listos en {time.perf_counter() - inicio:.2f} s")
+        print(reporte_importaciones())
+
+
+def precalentar(modulos=MODULOS_PESADOS, informar=True):
+    """
+    Importa los módulos pesados en un hilo en segundo plano (una sola vez por
+    proceso) y devuelve el hilo. Si una etapa pide un módulo antes de que
+    termine, importar() la hace esperar al import en curso.
+    """
+    global _hilo_precalentado
+    with _candado:
+        if _hilo_precalentado is None:
+            _hilo_precalentado = threading.Thread(
+                target=_importar_todos, args=(modulos, informar),
+                name="precalentar-importaciones", daemon=True)
+            _hilo_precalentado.start()
+        return _hilo_precalentado
+
+
+def reporte_importaciones():
+    """Texto con los tiempos de importación en frío, de mayor a menor."""
+    with _candado:
+        filas = sorted(TIEMPOS.items(), key=lambda item: item[1], reverse=True)
+    if not filas:
+        return "  (sin importaciones registradas)"
+    ancho = max(len(nombre) for nombre, _ in filas)
+    lineas = [f"  {nombre:<{ancho}}  {segundos:>7.3f} s" for nombre, segundos in filas]
+    lineas.append(f"  {'TOTAL':<{ancho}}  {sum(s for _, s in filas):>7.3f} s")
+    return "\n".join(lineas)
@@ -0,0 +1,150 @@
+"""
+Ingesta incremental de los CSV de leyes, que solo crecen agregando filas al final.
+
+Por archivo y esquema de bandas se guarda en .cache_leyes/ el byte hasta el
+que ya se leyó y las sumas por banda acumuladas (TMH, TMS, %Cu·TMS,
+Au·TMS, Ag·TMS). En la siguiente ejecución solo se parsea la cola nueva y
+se suma a lo acumulado. Se recalcula todo si cambió la cabecera, si el
+archivo se acortó o si cambiaron los últimos BYTES_FIRMA bytes ya leídos;
+una edición en el mismo lugar más atrás (mismo largo) no se detecta, porque
+para verla habría que releer todo lo ya leído. Con verificar_todo=True se
+relee (sin parsear) y se compara el hash de todo lo ya leído, así que
+cualquier edición se detecta a costa de una lectura completa del archivo.
+"""
+
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from carga import COLUMNAS_REQUERIDAS, DIRECTORIO_CACHE, tipar_columnas
+from leyes import firma_esquema, sumas_por_banda, sumas_vacias
+
+# Bytes previos al offset guardado que se comparan para detectar ediciones
+BYTES_FIRMA = 4096
+# Bloque de lectura para el hash de todo lo ya leído (verificar_todo)
+BYTES_BLOQUE = 1 << 20
+
+
+def ruta_estado(ruta, esquema):
+    """Archivo JSON con el estado incremental de un CSV para un esquema de bandas."""
+    carpeta = os.path.join(os.path.dirname(os.path.abspath(ruta)), DIRECTORIO_CACHE)
+    return os.path.join(carpeta, f"{os.path.basename(ruta)}.{firma_esquema(esquema)}.incremental.json")
+
+
+def _hash(datos):
+    return hashlib.sha1(datos).hexdigest()
+
+
+def _firma(f, offset):
+    inicio = max(0, offset - BYTES_FIRMA)
+    f.seek(inicio)
+    return _hash(f.read(offset - inicio))
+
+
+def _hash_prefijo(f, offset):
+    """sha1 en curso de los bytes [0, offset) del archivo, leídos por bloques."""
+    h = hashlib.sha1()
+    f.seek(0)
+    restantes = offset
+    while restantes > 0:
+        bloque = f.read(min(BYTES_BLOQUE, restantes))
+        if not bloque:
+            break
+        h.update(bloque)
+        restantes -= len(bloque)
+    return h
+
+
+def _leer_estado(ruta_json):
+    try:
+        with open(ruta_json, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _guardar_estado(ruta_json, estado):
+    try:
+        os.makedirs(os.path.dirname(ruta_json), exist_ok=True)
+        temporal = f"{ruta_json}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(estado, f)
+        os.replace(temporal, ruta_json)
+    except OSError:
+        pass
+
+
+def _sumas_de_bytes(cabecera, datos, esquema):
+    """Sumas por banda de un bloque de líneas completas del CSV (sin cabecera)."""
+    if not datos.strip():
+        return sumas_vacias(esquema)
+    # Sin dropna: en un bloque corto una columna real puede venir vacía
+    df = tipar_columnas(pd.read_csv(io.BytesIO(cabecera + datos), sep=';'))
+    return sumas_por_banda(df, esquema)
+
+
+def sumas_incrementales(ruta, esquema, verificar_todo=False):
+    """
+    Sumas por banda de todo el CSV (ver leyes.sumas_por_banda) leyendo solo
+    las filas agregadas desde la última llamada. Con verificar_todo también
+    se comprueba que no haya cambiado nada de lo ya leído (ver el módulo).
+    Lanza FileNotFoundError si el archivo no existe y ValueError si faltan
+    columnas requeridas.
+    """
+    ruta_json = ruta_estado(ruta, esquema)
+    estado = _leer_estado(ruta_json)
+
+    with open(ruta, "rb") as f:
+        cabecera = f.readline()
+        columnas = cabecera.decode("utf-8-sig").strip().split(";")
+        faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in columnas]
+        if faltantes:
+            raise ValueError(f"El archivo no contiene las columnas {faltantes}.")
+
+        tamano = os.fstat(f.fileno()).st_size
+        valido = (
+            estado is not None
+            and estado.get("cabecera") == _hash(cabecera)
+            and len(estado.get("sumas", [])) == len(esquema["bandas"]) + 1
+            and len(cabecera) <= estado.get("offset", -1) <= tamano
+            and _firma(f, estado["offset"]) == estado.get("firma")
+        )
+        prefijo = None
+        if valido and verificar_todo:
+            prefijo = _hash_prefijo(f, estado["offset"])
+            valido = prefijo.hexdigest() == estado.get("firma_total")
+        if valido:
+            inicio = estado["offset"]
+            sumas = np.asarray(estado["sumas"], dtype=float)
+        else:
+            inicio = len(cabecera)
+            sumas = sumas_vacias(esquema)
+            prefijo = None
+
+        f.seek(inicio)
+        nuevos = f.read()
+        # Solo se consolidan líneas completas; una última línea sin salto
+        # se cuenta en el resultado pero se vuelve a leer la próxima vez
+        fin = nuevos.rfind(b"\n") + 1
+        sumas = sumas + _sumas_de_bytes(cabecera, nuevos[:fin], esquema)
+        offset = inicio + fin
+        firma = _firma(f, offset)
+
+    estado = {
+        "cabecera": _hash(cabecera),
+        "offset": offset,
+        "firma": firma,
+        "sumas": sumas.tolist(),
+    }
+    if verificar_todo:
+        # El hash sigue desde lo ya verificado: el archivo se lee una sola vez
+        if prefijo is None:
+            prefijo = hashlib.sha1(cabecera)
+        prefijo.update(nuevos[:fin])
+        estado["firma_total"] = prefijo.hexdigest()
+    _guardar_estado(ruta_json, estado)
+    return sumas + _sumas_de_bytes(cabecera, nuevos[fin:], esquema)
@@ -0,0 +1,279 @@
+"""
+Motor de agregación por bandas de ley (%Cu) compartido por los scripts de leyes.
+
+Cada fila se asigna a una banda una sola vez y las sumas de TMH, TMS y de
+las leyes ponderadas por TMS se acumulan por banda en una sola pasada, sin
+crear copias del DataFrame por categoría.
+"""
+
+import hashlib
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Esquemas de bandas de ley (%Cu) por tipo de mineral. Cada banda es un
+# intervalo en notación matemática: '[' / ']' incluyen el extremo, '(' / ')'
+# lo excluyen. Las bandas no deben solaparse; lo que no cae en ninguna
+# banda solo cuenta para el Total. Las filas de la tabla resumen siguen el
+# orden en que se declaran las bandas.
+ESQUEMA_SULFUROS = {
+    'nombre': 'Sulfuros',
+    'bandas': {
+        'Ley Alta': '(1.0, inf)',
+        'Ley Media': '[0.8, 1.0]',
+        'Ley Baja': '[0.1, 0.8)',
+    },
+}
+
+ESQUEMA_MIXTO = {
+    'nombre': 'Mixto',
+    'bandas': {
+        'Ley Alta': '(3.0, inf)',
+        'Ley Media': '[2.0, 3.0]',
+        'Ley Baja': '[0.1, 2.0)',
+    },
+}
+
+# Nombre en la tabla general y esquema por valor de la columna TIPO DE MINERAL
+MATERIALES = {
+    'SULFUROS': ('Sulfuro', ESQUEMA_SULFUROS),
+    'MIXTO': ('Mixto', ESQUEMA_MIXTO),
+}
+
+COLUMNAS_RESUMEN = [
+    'Categoría', 'Total TMH', 'Total TMS', 'Promedio Ponderado %Cu',
+    'Promedio Ponderado Au g/TM', 'Promedio Ponderado Ag g/TM'
+]
+
+
+def esquema_tres_bandas(nombre, ley_minima, inicio_media, fin_media):
+    """Esquema Alta/Media/Baja con los mismos criterios de inclusión que los esquemas estándar."""
+    return {
+        'nombre': nombre,
+        'bandas': {
+            'Ley Alta': f'({fin_media}, inf)',
+            'Ley Media': f'[{inicio_media}, {fin_media}]',
+            'Ley Baja': f'[{ley_minima}, {inicio_media})',
+        },
+    }
+
+
+def _parsear_intervalo(texto):
+    texto = texto.strip()
+    if texto[0] not in '[(' or texto[-1] not in '])' or texto.count(',') != 1:
+        raise ValueError(f"Intervalo inválido: '{texto}'. Usa por ejemplo '[0.8, 1.0)'.")
+    desde, hasta = (float(v) for v in texto[1:-1].split(','))
+    if desde > hasta:
+        raise ValueError(f"Intervalo inválido: '{texto}'. El inicio es mayor que el fin.")
+    return desde, hasta, texto[0] == '[', texto[-1] == ']'
+
+
+def intervalo_banda(esquema, etiqueta):
+    """(desde, hasta) de una banda del esquema."""
+    return _parsear_intervalo(esquema['bandas'][etiqueta])[:2]
+
+
+def _en_intervalo(x, intervalo):
+    desde, hasta, incluye_desde, incluye_hasta = intervalo
+    return ((x > desde or (incluye_desde and x == desde))
+            and (x < hasta or (incluye_hasta and x == hasta)))
+
+
+def _punto_interior(desde, hasta):
+    if np.isinf(desde) and np.isinf(hasta):
+        return 0.0
+    if np.isinf(desde):
+        return hasta - 1.0
+    if np.isinf(hasta):
+        return desde + 1.0
+    return (desde + hasta) / 2
+
+
+def compilar_esquema(esquema):
+    """
+    Convierte un esquema en (bordes, atomos) para clasificar con un searchsorted.
+
+    bordes son los extremos distintos ordenados. La recta se divide en 2k + 1
+    tramos: (-inf, b0), {b0}, (b0, b1), {b1}, ..., (b_k-1, inf); atomos[t] es
+    el código de banda del tramo t (0 = ninguna). Lanza ValueError si dos
+    bandas se solapan.
+    """
+    intervalos = [_parsear_intervalo(t) for t in esquema['bandas'].values()]
+    bordes = np.unique([v for desde, hasta, _, _ in intervalos for v in (desde, hasta)])
+
+    # Un punto representativo por tramo para decidir a qué banda pertenece
+    puntos = []
+    anterior = -np.inf
+    for borde in bordes:
+        puntos += [_punto_interior(anterior, borde), borde]
+        anterior = borde
+    puntos.append(_punto_interior(anterior, np.inf))
+
+    atomos = np.zeros(len(puntos), dtype=np.intp)
+    for t, x in enumerate(puntos):
+        dentro = [codigo for codigo, intervalo in enumerate(intervalos, start=1)
+                  if _en_intervalo(x, intervalo)]
+        if len(dentro) > 1:
+            nombres = [list(esquema['bandas'])[c - 1] for c in dentro]
+            raise ValueError(f"Las bandas {nombres} del esquema '{esquema['nombre']}' se solapan.")
+        atomos[t] = dentro[0] if dentro else 0
+    return bordes, atomos
+
+
+@lru_cache(maxsize=64)
+def _compilar_bandas(nombre, bandas):
+    bordes, atomos = compilar_esquema({'nombre': nombre, 'bandas': dict(bandas)})
+    # Compartidos entre llamadas: de solo lectura
+    bordes.flags.writeable = False
+    atomos.flags.writeable = False
+    return bordes, atomos
+
+
+def esquema_compilado(esquema):
+    """compilar_esquema con caché por contenido del esquema (nombre y bandas)."""
+    return _compilar_bandas(esquema['nombre'], tuple(esquema['bandas'].items()))
+
+
+def firma_esquema(esquema):
+    """Identificador corto y estable de las bandas de un esquema (para claves de caché)."""
+    texto = json.dumps(list(esquema['bandas'].items()))
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()[:12]
+
+
+def sumas_vacias(esquema):
+    """Matriz de sumas_por_banda en cero para un esquema."""
+    return np.zeros((len(esquema['bandas']) + 1, 5))
+
+
+def codificar_bandas(cu, esquema):
+    """Código de banda por fila: 0 = fuera de toda banda o sin dato, i = i-ésima banda del esquema."""
+    cu = np.asarray(cu)
+    if not np.issubdtype(cu.dtype, np.floating):
+        cu = cu.astype(float)
+    bordes, atomos = esquema_compilado(esquema)
+    # Los bordes se comparan en la misma precisión que las leyes (float32 desde la caché)
+    bordes = bordes.astype(cu.dtype)
+
+    j = np.searchsorted(bordes, cu, side='left')
+    en_borde = bordes[np.minimum(j, len(bordes) - 1)] == cu
+    codigos = atomos[2 * j + en_borde]
+    codigos[np.isnan(cu)] = 0
+    return codigos
+
+
+def _pesos(df):
+    """Columnas a sumar por banda: TMH, TMS, %Cu·TMS, Au·TMS y Ag·TMS."""
+    tms = df['TMS'].to_numpy(dtype=float)
+    return [
+        df['TMH'].to_numpy(dtype=float),
+        tms,
+        df['%Cu'].to_numpy(dtype=float) * tms,
+        df['Au g/TM'].to_numpy(dtype=float) * tms,
+        df['Ag g/TM'].to_numpy(dtype=float) * tms,
+    ]
+
+
+def _sumar(codigos, pesos, n_codigos):
+    return np.column_stack([
+        np.bincount(codigos, weights=w, minlength=n_codigos) for w in pesos
+    ])
+
+
+def sumas_por_banda(df, esquema):
+    """
+    Sumas por código de banda: matriz (n_bandas + 1, 5) con columnas
+    TMH, TMS, %Cu·TMS, Au·TMS y Ag·TMS. La fila 0 acumula lo que queda fuera
+    de las bandas pero sí cuenta para el Total.
+    """
+    codigos = codificar_bandas(df['%Cu'].to_numpy(), esquema)
+    # nan_to_num replica a pandas .sum(), que ignora los NaN
+    pesos = [np.nan_to_num(w) for w in _pesos(df)]
+    return _sumar(codigos, pesos, len(esquema['bandas']) + 1)
+
+
+def sumas_por_esquemas(df, esquemas):
+    """
+    sumas_por_banda de varios esquemas sobre el mismo DataFrame. Las columnas
+    y los pesos se convierten una sola vez; luego cada esquema clasifica las
+    filas y acumula sus sumas (una pasada por esquema), para comparar
+    políticas de corte sin recargar ni volver a filtrar.
+    """
+    cu = df['%Cu'].to_numpy()
+    pesos = [np.nan_to_num(w) for w in _pesos(df)]
+    return [_sumar(codificar_bandas(cu, e), pesos, len(e['bandas']) + 1) for e in esquemas]
+
+
+def indice_por_fecha(df, esquema):
+    """
+    Índice de sumas acumuladas por día y banda para consultar rangos de FECHA.
+
+    Devuelve (dias, acumulado): dias son los días distintos ordenados
+    (datetime64[D]) y acumulado[i] es la matriz de sumas_por_banda de todas
+    las filas anteriores a dias[i]; acumulado tiene len(dias) + 1 entradas.
+    Las filas sin FECHA no entran en el índice.
+    """
+    n_codigos = len(esquema['bandas']) + 1
+    if 'FECHA' not in df.columns:
+        return np.array([], dtype='datetime64[D]'), np.zeros((1, n_codigos, 5))
+
+    fechas = pd.to_datetime(df['FECHA'], dayfirst=True, errors='coerce').to_numpy('datetime64[D]')
+    validas = ~np.isnat(fechas)
+    dias, n_dia = np.unique(fechas[validas], return_inverse=True)
+    codigos = codificar_bandas(df['%Cu'].to_numpy(), esquema)[validas]
+    grupo = n_dia * n_codigos + codigos
+
+    por_dia = np.stack([
+        np.bincount(grupo, weights=np.nan_to_num(w[validas]), minlength=len(dias) * n_codigos)
+        for w in _pesos(df)
+    ], axis=-1).reshape(len(dias), n_codigos, 5)
+
+    acumulado = np.zeros((len(dias) + 1, n_codigos, 5))
+    np.cumsum(por_dia, axis=0, out=acumulado[1:])
+    return dias, acumulado
+
+
+def sumas_entre_fechas(indice, inicio, fin):
+    """Sumas por banda de los días entre inicio y fin (ambos inclusive) usando indice_por_fecha."""
+    dias, acumulado = indice
+    i = np.searchsorted(dias, np.datetime64(inicio, 'D'), side='left')
+    j = np.searchsorted(dias, np.datetime64(fin, 'D'), side='right')
+    return acumulado[j] - acumulado[i]
+
+
+def _tabla_ponderada(filas, etiquetas, columna_etiqueta):
+    """DataFrame con TMH, TMS y promedios ponderados por TMS a partir de filas de sumas."""
+    filas = np.asarray(filas, dtype=float)
+    tms = filas[:, 1:2]
+    promedios = np.divide(filas[:, 2:], tms, out=np.zeros_like(filas[:, 2:]), where=tms > 0)
+
+    tabla = pd.DataFrame(np.column_stack([filas[:, :2], promedios]),
+                         columns=COLUMNAS_RESUMEN[1:])
+    tabla.insert(0, columna_etiqueta, list(etiquetas))
+    return tabla
+
+
+def tabla_resumen(sumas, esquema):
+    """Tabla por banda (en el orden del esquema) más Total, a partir de sumas_por_banda."""
+    sumas = np.asarray(sumas, dtype=float)
+    filas = np.vstack([sumas[1:], sumas.sum(axis=0)])
+    return _tabla_ponderada(filas, list(esquema['bandas']) + ['Total'], 'Categoría')
+
+
+def tabla_general(sumas_por_material):
+    """Tabla Sulfuro/Mixto/Total General a partir de {TIPO DE MINERAL: sumas_por_banda}."""
+    etiquetas = [MATERIALES[tipo][0] for tipo in sumas_por_material]
+    filas = [np.asarray(sumas, dtype=float).sum(axis=0) for sumas in sumas_por_material.values()]
+    filas.append(np.sum(filas, axis=0) if filas else np.zeros(5))
+    return _tabla_ponderada(filas, etiquetas + ['Total General'], 'Tipo de Material')
+
+
+def resumen_por_bandas(df, esquema):
+    """Tabla resumen por bandas de ley de un DataFrame con TMH, TMS, %Cu, Au g/TM y Ag g/TM."""
+    return tabla_resumen(sumas_por_banda(df, esquema), esquema)
+
+
+def comparar_esquemas(df, esquemas):
+    """{nombre del esquema: tabla resumen} de varios esquemas (ver sumas_por_esquemas)."""
+    return {e['nombre']: tabla_resumen(s, e) for e, s in zip(esquemas, sumas_por_esquemas(df, esquemas))}
@@ -0,0 +1,134 @@
+"""
+Resumen de leyes por lote: agrega todos los CSV de un directorio o patrón glob.
+
+Cada archivo (una exportación mensual por material) se parsea y se reduce a
+sus sumas por banda en un proceso aparte; luego se combinan las sumas de
+todos los archivos en las tablas por material y en la tabla general
+Sulfuro / Mixto / Total General.
+
+Uso:
+    python lote.py exportaciones/
+    python lote.py "exportaciones/*_2025_*.csv" --procesos 8 --salida resumen_general.csv
+"""
+
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from carga import COLUMNAS_REQUERIDAS, leer_csv_leyes
+from leyes import MATERIALES, sumas_por_banda, sumas_vacias, tabla_general, tabla_resumen
+
+
+def listar_archivos(patron):
+    """Archivos .csv de un directorio, o los que coinciden con un patrón glob, ordenados."""
+    if os.path.isdir(patron):
+        patron = os.path.join(patron, "*.csv")
+    return sorted(glob.glob(patron))
+
+
+def _tipo_por_nombre(ruta):
+    nombre = os.path.basename(ruta).upper()
+    for tipo in MATERIALES:
+        if tipo.rstrip("S") in nombre:
+            return tipo
+    return None
+
+
+def sumas_archivo(ruta):
+    """
+    ({TIPO DE MINERAL: sumas_por_banda}, {tipo no reconocido: filas}) de un
+    archivo. El material de cada fila sale de la columna TIPO DE MINERAL o,
+    si no existe, del nombre del archivo; las filas de otros tipos no entran
+    en las sumas y se cuentan en el segundo dict.
+    """
+    df = leer_csv_leyes(ruta)
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"El archivo no contiene las columnas {faltantes}.")
+
+    if 'TIPO DE MINERAL' in df.columns:
+        # Sin fillna, groupby descartaría las filas sin tipo sin contarlas
+        tipos = df['TIPO DE MINERAL'].astype("string").str.strip().str.upper().fillna("(SIN TIPO)")
+    else:
+        tipo = _tipo_por_nombre(ruta)
+        if tipo is None:
+            raise ValueError("No se puede determinar el tipo de mineral.")
+        tipos = pd.Series(tipo, index=df.index)
+
+    resultado, omitidas = {}, {}
+    for tipo, grupo in df.groupby(tipos, sort=False):
+        if tipo in MATERIALES:
+            resultado[tipo] = sumas_por_banda(grupo, MATERIALES[tipo][1])
+        else:
+            omitidas[tipo] = len(grupo)
+    return resultado, omitidas
+
+
+def _procesar(ruta):
+    try:
+        return ruta, *sumas_archivo(ruta), None
+    except Exception as e:
+        return ruta, {}, {}, str(e)
+
+
+def sumas_lote(archivos, procesos=None):
+    """
+    Sumas por banda combinadas de varios archivos, calculadas en paralelo.
+
+    Devuelve ({TIPO DE MINERAL: sumas}, [(ruta, error), ...], [(ruta,
+    {tipo: filas}), ...]). Los archivos con error se omiten del total y se
+    informan en la segunda lista; la tercera tiene, por archivo, las filas
+    de tipos de mineral no reconocidos que quedaron fuera.
+    """
+    totales = {tipo: sumas_vacias(esquema) for tipo, (_, esquema) in MATERIALES.items()}
+    errores, omitidas = [], []
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for ruta, sumas, otros_tipos, error in pool.map(_procesar, archivos):
+            if error is not None:
+                errores.append((ruta, error))
+            if otros_tipos:
+                omitidas.append((ruta, otros_tipos))
+            for tipo, s in sumas.items():
+                totales[tipo] += s
+    return totales, errores, omitidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumen de leyes de todos los CSV de un directorio o patrón glob.")
+    parser.add_argument("patron", help="directorio con los CSV o patrón glob (entre comillas)")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--salida", help="guarda la tabla general en este CSV")
+    args = parser.parse_args()
+
+    archivos = listar_archivos(args.patron)
+    if not archivos:
+        print(f"No se encontraron archivos CSV en '{args.patron}'.")
+        sys.exit(1)
+
+    totales, errores, omitidas = sumas_lote(archivos, args.procesos)
+    for ruta, error in errores:
+        print(f"  ! {ruta}: {error}")
+    for ruta, otros_tipos in omitidas:
+        detalle = ", ".join(f"{tipo}: {filas}" for tipo, filas in otros_tipos.items())
+        print(f"  - {ruta}: {sum(otros_tipos.values())} filas omitidas por TIPO DE MINERAL ({detalle})")
+
+    pd.set_option("display.width", 200)
+    for tipo, sumas in totales.items():
+        print(f"\nTabla Resumen: {MATERIALES[tipo][0]}")
+        print(tabla_resumen(sumas, MATERIALES[tipo][1]).round(4).to_string(index=False))
+
+    general = tabla_general(totales)
+    print(f"\nResumen General ({len(archivos) - len(errores)} de {len(archivos)} archivos)")
+    print(general.round(4).to_string(index=False))
+
+    if args.salida:
+        general.to_csv(args.salida, sep=';', index=False)
+        print(f"\n  → Guardada: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
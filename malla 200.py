@@ -16,39 +16,40 @@ Pasos:
 =============================================================
 
 REQUISITOS (instalar una sola vez en terminal):
-  pip install pandas numpy scipy statsmodels scikit-learn matplotlib
+  pip install pandas numpy scipy scikit-learn matplotlib
 """
 
 import sys
 import os
+import time
 
 # Forzar UTF-8 en la consola (evita errores de encoding en Windows)
 if sys.stdout.encoding != "utf-8":
     sys.stdout.reconfigure(encoding="utf-8")
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
+from importaciones import cronometro, importar, reporte_importaciones
+
+# scipy y sklearn se importan en la etapa que los usa; al
+# final se imprime el tiempo de importación de cada uno
+with cronometro("pandas + numpy + matplotlib"):
+    import pandas as pd
+    import numpy as np
+    import matplotlib.pyplot as plt
 import warnings
 warnings.filterwarnings("ignore")
 
-from scipy import stats
-import statsmodels.api as sm
-
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures, StandardScaler
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.neural_network import MLPRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-from sklearn.pipeline import Pipeline
+import registro
+from compilado import compilar, tabla_compilados
+from graficos import dispersion
+from modelos import HIPERPARAMETROS, LIMPIEZA, NOMBRES, limpiar_outliers, matrices, preparar_datos
 
 # ─────────────────────────────────────────────────────────────
 # CONFIGURACIÓN  ← cambia aquí la ruta si mueves el archivo
 # ─────────────────────────────────────────────────────────────
 ARCHIVO_CSV = r"C:\Users\Rommel2025\Downloads\Data_Ordenada_Lineas_Agitador_Torta (1).csv"
-COLUMNA_X   = "AGIT -200M"
-COLUMNA_Y   = "AGIT -325M"
+BUSCAR_HIPERPARAMETROS = False   # True: busca RF/MLP antes de entrenar (ver busqueda.py)
+PRESUPUESTO_BUSQUEDA_S = 60
+PREDICCION_COMPILADA = False     # True: predicción interactiva con modelos tabulados (ver compilado.py)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -59,11 +60,8 @@ print("  CARGA DE DATOS")
 print("=" * 60)
 
 df    = pd.read_csv(ARCHIVO_CSV)
-datos = df[[COLUMNA_X, COLUMNA_Y]].dropna().copy()
-datos.columns = ["malla_200", "malla_325"]
-
-# Eliminar valor erróneo evidente (877.0 es typo de 87.7)
-datos = datos[datos["malla_200"] < 200].copy()
+# Sin nulos y sin el valor erróneo evidente (877.0 es typo de 87.7)
+datos = preparar_datos(df)
 
 print(f"Filas cargadas (ambas columnas presentes): {len(datos)}")
 print("\nEstadísticas iniciales:")
@@ -77,22 +75,9 @@ print("\n" + "=" * 60)
 print("  ELIMINACIÓN DE OUTLIERS")
 print("=" * 60)
 
-def mascara_iqr(serie, factor=1.5):
-    q1, q3 = serie.quantile(0.25), serie.quantile(0.75)
-    iqr = q3 - q1
-    return (serie >= q1 - factor * iqr) & (serie <= q3 + factor * iqr)
-
-mask_iqr  = mascara_iqr(datos["malla_200"]) & mascara_iqr(datos["malla_325"])
-datos_iqr = datos[mask_iqr].copy()
+datos_iqr, datos_clean = limpiar_outliers(datos)
 print(f"Outliers eliminados por IQR:         {len(datos) - len(datos_iqr)}")
-
-X_sm      = sm.add_constant(datos_iqr["malla_200"])
-modelo_sm = sm.OLS(datos_iqr["malla_325"], X_sm).fit()
-cooks_d   = modelo_sm.get_influence().cooks_distance[0]
-mask_cook = cooks_d < 4 / len(datos_iqr)
-
-datos_clean = datos_iqr[mask_cook].reset_index(drop=True)
-print(f"Outliers eliminados por Cook's D:    {mask_cook.sum().__rsub__(len(datos_iqr))}")
+print(f"Outliers eliminados por Cook's D:    {len(datos_iqr) - len(datos_clean)}")
 print(f"Total outliers eliminados:           {len(datos) - len(datos_clean)}")
 print(f"Puntos limpios restantes:            {len(datos_clean)}")
 
@@ -104,6 +89,8 @@ print("\n" + "=" * 60)
 print("  GENERANDO GRÁFICAS DE CORRELACIÓN")
 print("=" * 60)
 
+stats = importar("scipy.stats")
+
 fig, axes = plt.subplots(1, 2, figsize=(15, 6.5))
 fig.patch.set_facecolor("#FAFAFA")
 fig.suptitle("Correlación AGIT -200M vs AGIT -325M",
@@ -117,7 +104,7 @@ for ax, xd, yd, titulo, color in [
     sl, ic, rv, _, _ = stats.linregress(xd, yd)
     xl = np.linspace(xd.min(), xd.max(), 300)
 
-    ax.scatter(xd, yd, color=color, alpha=0.4, edgecolors="none", s=18, zorder=3)
+    dispersion(ax, xd, yd, color, alpha=0.4, s=18, zorder=3)
     ax.plot(xl, sl * xl + ic, color="#D85A30", lw=2, ls="--",
             zorder=4, label="Regresión lineal")
 
@@ -146,105 +133,77 @@ print("  → Guardada: correlacion_outliers.png")
 # ═══════════════════════════════════════════════════════════════
 # 4. PREPARACIÓN PARA MODELOS
 # ═══════════════════════════════════════════════════════════════
-X = datos_clean[["malla_200"]].values
-y = datos_clean["malla_325"].values
+X, y = matrices(datos_clean)
+k = HIPERPARAMETROS["pliegues"]
+
+hiper = HIPERPARAMETROS
+if BUSCAR_HIPERPARAMETROS:
+    from busqueda import buscar_hiperparametros
+
+    print("\n" + "=" * 60)
+    print(f"  BÚSQUEDA DE HIPERPARÁMETROS  (máx. {PRESUPUESTO_BUSQUEDA_S} s)")
+    print("=" * 60)
+    hiper, df_ensayos, desde_cache = buscar_hiperparametros(
+        X, y, HIPERPARAMETROS, presupuesto_s=PRESUPUESTO_BUSQUEDA_S)
+    if desde_cache:
+        print("  (resultado de una búsqueda previa en caché)")
+    else:
+        print(df_ensayos.round(4).to_string(index=False))
+    print(f"\n  Random Forest → {hiper['rf']}")
+    print(f"  MLP           → {hiper['mlp']}")
 
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
-
-def calcular_metricas(nombre, y_real, y_pred):
-    rmse = np.sqrt(mean_squared_error(y_real, y_pred))
-    mae  = mean_absolute_error(y_real, y_pred)
-    r2   = r2_score(y_real, y_pred)
-    return {"modelo": nombre, "RMSE": rmse, "MAE": mae, "R2": r2}
-
-resultados = []
-
-# ─────────────────────────────────────────────────────────────
-# 4a. Regresión Lineal Simple
-# ─────────────────────────────────────────────────────────────
 print("\n" + "=" * 60)
 print("  MODELOS DE PREDICCIÓN")
 print("=" * 60)
-print("\n[a] Regresión Lineal Simple")
-
-modelo_lin = LinearRegression().fit(X_train, y_train)
-y_pred_lin = modelo_lin.predict(X_test)
-resultados.append(calcular_metricas("Regresión Lineal", y_test, y_pred_lin))
-print(f"    Coef: {modelo_lin.coef_[0]:.4f}  |  Intercepto: {modelo_lin.intercept_:.4f}")
-
-# ─────────────────────────────────────────────────────────────
-# 4b. Regresión Polinomial (grado 2)
-# ─────────────────────────────────────────────────────────────
-print("\n[b] Regresión Polinomial (grado 2)")
-
-modelo_poly = Pipeline([
-    ("poly", PolynomialFeatures(degree=2, include_bias=False)),
-    ("reg",  LinearRegression()),
-]).fit(X_train, y_train)
-y_pred_poly = modelo_poly.predict(X_test)
-resultados.append(calcular_metricas("Regresión Polinomial g=2", y_test, y_pred_poly))
-
-# ─────────────────────────────────────────────────────────────
-# 4c. Random Forest
-# ─────────────────────────────────────────────────────────────
-print("\n[c] Random Forest")
-
-modelo_rf = RandomForestRegressor(
-    n_estimators=200, max_depth=10,
-    min_samples_leaf=5, random_state=42, n_jobs=-1
-).fit(X_train, y_train)
-y_pred_rf = modelo_rf.predict(X_test)
-resultados.append(calcular_metricas("Random Forest", y_test, y_pred_rf))
 
-# ─────────────────────────────────────────────────────────────
-# 4d. Red Neuronal (MLP)
-# ─────────────────────────────────────────────────────────────
-print("\n[d] Red Neuronal (MLP)")
-
-modelo_nn = Pipeline([
-    ("scaler", StandardScaler()),
-    ("mlp", MLPRegressor(
-        hidden_layer_sizes=(64, 32, 16),
-        activation="relu",
-        max_iter=1000,
-        random_state=42,
-        early_stopping=True,
-        validation_fraction=0.1,
-    )),
-]).fit(X_train, y_train)
-y_pred_nn = modelo_nn.predict(X_test)
-resultados.append(calcular_metricas("Red Neuronal (MLP)", y_test, y_pred_nn))
+# Registro local: con el mismo CSV, limpieza e hiperparámetros se cargan los
+# modelos y las métricas guardados en vez de reentrenar. Si no, se entrenan
+# los cuatro modelos (a) Lineal b) Polinomial g=2 c) Random Forest d) MLP)
+# en paralelo y se validan con k pliegues; ranking combinado sobre las
+# medias: menor rango promedio = mejor en las 3 métricas
+inicio = time.perf_counter()
+registro_modelos, clave, desde_registro = registro.obtener(ARCHIVO_CSV, X, y, hiper, LIMPIEZA)
+
+modelos, tiempos_ajuste, total_ajuste = (registro_modelos["modelos"], registro_modelos["tiempos_ajuste"],
+                                         registro_modelos["total_ajuste"])
+df_res, mejor_global = registro_modelos["df_res"], registro_modelos["mejor_global"]
+df_pliegues, total_cv = registro_modelos["df_pliegues"], registro_modelos["total_cv"]
+if desde_registro:
+    print(f"  Modelos cargados del registro en {(time.perf_counter() - inicio) * 1000:.0f} ms "
+          f"(clave {clave}); tiempos de abajo = entrenamiento original.")
+else:
+    print(f"  Modelos entrenados y guardados en el registro (clave {clave}).")
+
+print()
+for letra, (nombre, segundos) in zip("abcd", tiempos_ajuste.items()):
+    print(f"[{letra}] {nombre:<28} ajuste: {segundos:6.2f} s")
+print(f"\n  Tiempo total (en paralelo): {total_ajuste:.2f} s  "
+      f"(en serie serían {sum(tiempos_ajuste.values()):.2f} s)")
+
+modelo_lin = modelos[0]
+print(f"\n  Regresión Lineal → Coef: {modelo_lin.coef_[0]:.4f}  |  Intercepto: {modelo_lin.intercept_:.4f}")
 
 
 # ═══════════════════════════════════════════════════════════════
 # 5. COMPARACIÓN DE MODELOS
 # ═══════════════════════════════════════════════════════════════
-df_res = pd.DataFrame(resultados).set_index("modelo")
-
-# Ranking combinado: menor rango promedio = mejor en las 3 métricas
-df_res["rank_R2"]   = df_res["R2"].rank(ascending=False)
-df_res["rank_RMSE"] = df_res["RMSE"].rank(ascending=True)
-df_res["rank_MAE"]  = df_res["MAE"].rank(ascending=True)
-df_res["rank_prom"] = (df_res["rank_R2"] + df_res["rank_RMSE"] + df_res["rank_MAE"]) / 3
-mejor_global = df_res["rank_prom"].idxmin()
-
-print("\n" + "=" * 65)
-print("  COMPARACIÓN DE MODELOS  (datos de prueba — 20%)")
-print("=" * 65)
-print(f"\n  {'Modelo':<28} {'RMSE':>7} {'MAE':>7} {'R²':>7}")
-print(f"  {'-'*52}")
-for idx, row in df_res[["RMSE", "MAE", "R2"]].iterrows():
+print("\n" + "=" * 79)
+print(f"  COMPARACIÓN DE MODELOS  (validación cruzada, {k} pliegues — media ± desv. est.)")
+print("=" * 79)
+print(f"\n  {'Modelo':<28} {'RMSE':>14} {'MAE':>14} {'R²':>14}")
+print(f"  {'-'*72}")
+for idx, row in df_res.iterrows():
     marca = "  ← MEJOR" if idx == mejor_global else ""
-    print(f"  {idx:<28} {row['RMSE']:>7.3f} {row['MAE']:>7.3f} {row['R2']:>7.3f}{marca}")
+    celdas = "".join(f" {row[m]:>6.3f} ± {row[m + ' ±']:.3f}" for m in ("RMSE", "MAE", "R²"))
+    print(f"  {idx:<28}{celdas}{marca}")
+print(f"\n  ({len(df_pliegues)} ajustes en {total_cv:.2f} s)")
 
-print(f"\n  {'─'*52}")
-print(f"  Mejor R²   → {df_res['R2'].idxmax()}  ({df_res['R2'].max():.4f})")
+print(f"\n  {'─'*72}")
+print(f"  Mejor R²   → {df_res['R²'].idxmax()}  ({df_res['R²'].max():.4f})")
 print(f"  Menor RMSE → {df_res['RMSE'].idxmin()}  ({df_res['RMSE'].min():.4f})")
 print(f"  Menor MAE  → {df_res['MAE'].idxmin()}  ({df_res['MAE'].min():.4f})")
 print(f"\n  ★ MEJOR MODELO GLOBAL → {mejor_global}")
-print("=" * 65)
+print("=" * 79)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -256,19 +215,17 @@ print("=" * 60)
 
 x_rango  = np.linspace(X.min(), X.max(), 300).reshape(-1, 1)
 colores  = ["#378ADD", "#1D9E75", "#D85A30", "#7F77DD"]
-nombres  = ["Regresión Lineal", "Regresión Polinomial g=2",
-            "Random Forest",    "Red Neuronal (MLP)"]
-modelos  = [modelo_lin, modelo_poly, modelo_rf, modelo_nn]
+nombres  = NOMBRES
 
 fig2, ax2 = plt.subplots(figsize=(11, 7))
 fig2.patch.set_facecolor("#FAFAFA")
 ax2.set_facecolor("#FAFAFA")
 
-ax2.scatter(datos_clean["malla_200"], datos_clean["malla_325"],
-            color="#888787", alpha=0.25, s=12, zorder=2, label="Datos limpios")
+dispersion(ax2, datos_clean["malla_200"], datos_clean["malla_325"], "#888787",
+           alpha=0.25, s=12, zorder=2, label="Datos limpios")
 
 for nombre, modelo, color in zip(nombres, modelos, colores):
-    r2_val = df_res.loc[nombre, "R2"]
+    r2_val = df_res.loc[nombre, "R²"]
     lw = 3.0 if nombre == mejor_global else 1.8
     ls = "-"  if nombre == mejor_global else "--"
     etiq = (f"★ {nombre} (R²={r2_val:.3f})  ← MEJOR"
@@ -295,21 +252,22 @@ print("  → Guardada: modelos_comparacion.png")
 # ═══════════════════════════════════════════════════════════════
 fig3, axes3 = plt.subplots(1, 3, figsize=(14, 5))
 fig3.patch.set_facecolor("#FAFAFA")
-fig3.suptitle("Comparación de métricas por modelo",
+fig3.suptitle(f"Comparación de métricas por modelo (media ± desv. estándar, {k} pliegues)",
               fontsize=14, fontweight="bold", y=1.01)
 
 nombres_cortos = ["Lineal", "Polinomial", "Random\nForest", "Red\nNeuronal"]
 
 for ax, metrica, titulo in zip(
     axes3,
-    ["RMSE", "MAE", "R2"],
+    ["RMSE", "MAE", "R²"],
     ["RMSE  (menor = mejor)", "MAE  (menor = mejor)", "R²  (mayor = mejor)"],
 ):
     ax.set_facecolor("#FAFAFA")
     valores  = df_res[metrica].values
-    idx_best = np.argmax(valores) if metrica == "R2" else np.argmin(valores)
+    idx_best = np.argmax(valores) if metrica == "R²" else np.argmin(valores)
     barras   = ax.bar(nombres_cortos, valores, color=colores, width=0.55,
-                      edgecolor="white", linewidth=0.5)
+                      edgecolor="white", linewidth=0.5,
+                      yerr=df_res[f"{metrica} ±"].values, capsize=4)
 
     # Resaltar la barra ganadora con borde negro
     barras[idx_best].set_edgecolor("black")
@@ -333,11 +291,26 @@ plt.show()
 print("  → Guardada: metricas_modelos.png")
 
 
+print("\n" + "=" * 60)
+print("  TIEMPOS DE IMPORTACIÓN (en frío)")
+print("=" * 60)
+print(reporte_importaciones())
+
+
 # ═══════════════════════════════════════════════════════════════
 # 6. PREDICCIÓN INTERACTIVA
 # ═══════════════════════════════════════════════════════════════
 modelo_elegido = dict(zip(nombres, modelos))[mejor_global]
 
+modelos_pred = modelos
+if PREDICCION_COMPILADA:
+    desde, hasta = registro_modelos["rango"]
+    modelos_pred = compilar(modelos, desde, hasta)
+    print(f"\n{'='*60}")
+    print(f"  MODELOS COMPILADOS  (tabla sobre {desde:.1f} – {hasta:.1f} %)")
+    print(f"{'='*60}")
+    print(tabla_compilados(modelos, modelos_pred).to_string(float_format=lambda v: f"{v:.6f}"))
+
 print(f"\n{'='*60}")
 print(f"  PREDICCIÓN INTERACTIVA")
 print(f"  Mejor modelo: {mejor_global}")
@@ -357,7 +330,7 @@ while True:
         print(f"  {'-'*48}")
         print(f"  {'Modelo':<28} {'AGIT -325M pred.':>16}")
         print(f"  {'-'*48}")
-        for nombre, modelo in zip(nombres, modelos):
+        for nombre, modelo in zip(nombres, modelos_pred):
             pred  = modelo.predict(xv)[0]
             marca = "  ← MEJOR" if nombre == mejor_global else ""
             print(f"  {nombre:<28} {pred:>14.2f}%{marca}")
@@ -0,0 +1,301 @@
+"""
+Pipeline AGIT -200M → AGIT -325M compartido por app.py y malla 200.py:
+limpieza (IQR + distancia de Cook), entrenamiento de los cuatro modelos
+y métricas con ranking combinado.
+"""
+
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cuantiles import BosquejoCuantiles, limites_iqr
+
+# sklearn se importa en la etapa que lo usa (ver importaciones.py)
+from importaciones import importar
+
+COLUMNA_X = "AGIT -200M"
+COLUMNA_Y = "AGIT -325M"
+COLUMNAS_MALLA = ("malla_200", "malla_325")
+
+NOMBRES = ["Regresión Lineal", "Regresión Polinomial g=2",
+           "Random Forest",    "Red Neuronal (MLP)"]
+
+# Búsquedas de hiperparámetros y modelos guardados (relativo al directorio de trabajo)
+DIRECTORIO_MODELOS = ".cache_modelos"
+
+# Por encima de estas filas los cuartiles del filtro IQR salen de un
+# bosquejo de cuantiles (memoria acotada) en lugar de ordenar las columnas
+FILAS_BOSQUEJO = 1_000_000
+FILAS_POR_BLOQUE = 200_000
+ERROR_BOSQUEJO = 0.005
+
+# Parámetros de limpieza: malla_200 debe ser menor que malla_200_max (877.0
+# es typo de 87.7), filtro Q1 - f·IQR / Q3 + f·IQR y Cook's D < cook_k / n
+LIMPIEZA = {
+    "malla_200_max": 200,
+    "factor_iqr": 1.5,
+    "cook_k": 4,
+}
+
+HIPERPARAMETROS = {
+    "test_size": 0.2,
+    "random_state": 42,
+    "pliegues": 5,
+    "poly_grado": 2,
+    "rf": dict(n_estimators=200, max_depth=10, min_samples_leaf=5, random_state=42),
+    "mlp": dict(hidden_layer_sizes=(64, 32, 16), activation="relu",
+                max_iter=1000, random_state=42,
+                early_stopping=True, validation_fraction=0.1),
+}
+
+
+def preparar_datos(df, columna_x=COLUMNA_X, columna_y=COLUMNA_Y, limpieza=LIMPIEZA):
+    """
+    Par (malla_200, malla_325) sin nulos y sin el valor erróneo evidente
+    (877.0 es typo de 87.7). Ese filtro es propio de COLUMNA_X: se aplica a
+    esa columna esté como X o como Y, y a ninguna otra.
+    """
+    datos = df[[columna_x, columna_y]].dropna().copy()
+    datos.columns = list(COLUMNAS_MALLA)
+    for columna, nombre in zip((columna_x, columna_y), COLUMNAS_MALLA):
+        if columna == COLUMNA_X:
+            datos = datos[datos[nombre] < limpieza["malla_200_max"]]
+    return datos.copy()
+
+
+def mascara_iqr(serie, factor=1.5, bosquejo=None):
+    """Filas dentro de [Q1 - f·IQR, Q3 + f·IQR]; con bosquejo, cuartiles aproximados de ese bosquejo."""
+    if bosquejo is None:
+        q1, q3 = serie.quantile(0.25), serie.quantile(0.75)
+        iqr = q3 - q1
+        bajo, alto = q1 - factor * iqr, q3 + factor * iqr
+    else:
+        bajo, alto = limites_iqr(bosquejo, factor)
+    return (serie >= bajo) & (serie <= alto)
+
+
+def bosquejos_malla(datos, error=ERROR_BOSQUEJO, filas_por_bloque=FILAS_POR_BLOQUE):
+    """{columna: BosquejoCuantiles} de malla_200 y malla_325, agregando por bloques."""
+    bosquejos = {col: BosquejoCuantiles(error) for col in COLUMNAS_MALLA}
+    for inicio in range(0, len(datos), filas_por_bloque):
+        bloque = datos.iloc[inicio:inicio + filas_por_bloque]
+        for col, bosquejo in bosquejos.items():
+            bosquejo.agregar(bloque[col].to_numpy())
+    return bosquejos
+
+
+def _bosquejos_archivo(ruta, error, filas_por_bloque):
+    bosquejos = None
+    lector = pd.read_csv(ruta, usecols=[COLUMNA_X, COLUMNA_Y], chunksize=filas_por_bloque)
+    for bloque in lector:
+        parcial = bosquejos_malla(preparar_datos(bloque), error, filas_por_bloque)
+        bosquejos = parcial if bosquejos is None else {
+            col: bosquejos[col].combinar(b) for col, b in parcial.items()}
+    return bosquejos
+
+
+def bosquejos_csv(rutas, error=ERROR_BOSQUEJO, filas_por_bloque=FILAS_POR_BLOQUE, procesos=None):
+    """
+    Bosquejos de malla_200 y malla_325 de varios CSV leídos por bloques, un
+    archivo por proceso, combinados al final. Las filas pasan por el mismo
+    preparar_datos que el análisis, así que los cuartiles corresponden a los
+    datos que se limpian. Se pasan a limpiar_outliers(..., bosquejos=...).
+    """
+    total = {col: BosquejoCuantiles(error) for col in COLUMNAS_MALLA}
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for parcial in pool.map(_bosquejos_archivo, rutas,
+                                [error] * len(rutas), [filas_por_bloque] * len(rutas)):
+            if parcial is not None:
+                for col, b in parcial.items():
+                    total[col].combinar(b)
+    return total
+
+
+def influencia_simple(x, y):
+    """
+    (apalancamiento, residuos, cooks_d) de la regresión y = a + b·x por MCO,
+    en forma cerrada: los mismos valores que statsmodels
+    OLS(...).get_influence() pero en O(n) sin construir la matriz de
+    influencia. Con un solo regresor (p = 2):
+
+        h_i = 1/n + (x_i - x̄)² / Sxx
+        D_i = e_i² / (p·s²) · h_i / (1 - h_i)²,   s² = SSE / (n - p)
+
+    Sin varianza en x, o con n ≤ 2, Cook's D es NaN.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n, p = len(x), 2
+
+    # Estadísticos suficientes, centrados para no perder precisión
+    dx  = x - x.mean()
+    sxx = dx @ dx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pendiente = (dx @ y) / sxx
+        residuos  = y - y.mean() - pendiente * dx
+        s2        = (residuos @ residuos) / (n - p) if n > p else np.nan
+        apalancamiento = 1 / n + dx * dx / sxx
+        cooks_d = residuos ** 2 / (p * s2) * apalancamiento / (1 - apalancamiento) ** 2
+    return apalancamiento, residuos, cooks_d
+
+
+def limpiar_outliers(datos, bosquejos=None, limpieza=LIMPIEZA):
+    """
+    Devuelve (datos_iqr, datos_clean): filtro IQR en ambas columnas y luego
+    Cook's D < 4/n (ver LIMPIEZA). bosquejos ({columna: BosquejoCuantiles}, ver
+    bosquejos_csv) da los cuartiles de un histórico mayor que datos; si no se
+    pasan y datos supera FILAS_BOSQUEJO se calculan por bloques.
+    """
+    if bosquejos is None and len(datos) > FILAS_BOSQUEJO:
+        bosquejos = bosquejos_malla(datos)
+    bosquejos = bosquejos or {}
+    factor    = limpieza["factor_iqr"]
+    mask_iqr  = (mascara_iqr(datos["malla_200"], factor, bosquejos.get("malla_200"))
+                 & mascara_iqr(datos["malla_325"], factor, bosquejos.get("malla_325")))
+    datos_iqr = datos[mask_iqr].copy()
+
+    _, _, cooks_d = influencia_simple(datos_iqr["malla_200"], datos_iqr["malla_325"])
+    mask_cook = cooks_d < limpieza["cook_k"] / len(datos_iqr)
+    return datos_iqr, datos_iqr[mask_cook].reset_index(drop=True)
+
+
+def matrices(datos_clean):
+    """X (n × 1) con malla_200 e y con malla_325."""
+    return datos_clean[["malla_200"]].values, datos_clean["malla_325"].values
+
+
+def huella_datos(X, y):
+    """Hash SHA-1 del contenido de X e y, para usar como clave de caché."""
+    h = hashlib.sha1()
+    for arreglo in (X, y):
+        arreglo = np.ascontiguousarray(arreglo, dtype=float)
+        h.update(str(arreglo.shape).encode())
+        h.update(arreglo.tobytes())
+    return h.hexdigest()
+
+
+def dividir(datos_clean, hiper=HIPERPARAMETROS):
+    """X, y y la partición entrenamiento / prueba."""
+    X, y = matrices(datos_clean)
+    train_test_split = importar("sklearn.model_selection").train_test_split
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=hiper["test_size"], random_state=hiper["random_state"]
+    )
+    return X, y, X_train, X_test, y_train, y_test
+
+
+def construir_modelos(hiper=HIPERPARAMETROS, n_jobs=-1):
+    """
+    Los cuatro modelos candidatos sin entrenar, en el orden de NOMBRES.
+    n_jobs es el paralelismo interno del Random Forest.
+    """
+    lineal        = importar("sklearn.linear_model")
+    preprocesado  = importar("sklearn.preprocessing")
+    ensamble      = importar("sklearn.ensemble")
+    red_neuronal  = importar("sklearn.neural_network")
+    Pipeline      = importar("sklearn.pipeline").Pipeline
+    return [
+        lineal.LinearRegression(),
+        Pipeline([
+            ("poly", preprocesado.PolynomialFeatures(degree=hiper["poly_grado"], include_bias=False)),
+            ("reg",  lineal.LinearRegression()),
+        ]),
+        ensamble.RandomForestRegressor(**hiper["rf"], n_jobs=n_jobs),
+        Pipeline([
+            ("scaler", preprocesado.StandardScaler()),
+            ("mlp", red_neuronal.MLPRegressor(**hiper["mlp"])),
+        ]),
+    ]
+
+
+def _ajustar(modelo, X_train, y_train):
+    inicio = time.perf_counter()
+    modelo.fit(X_train, y_train)
+    return modelo, time.perf_counter() - inicio
+
+
+def entrenar_con_tiempos(X_train, y_train, hiper=HIPERPARAMETROS, hilos=None):
+    """
+    Entrena los cuatro modelos a la vez, uno por hilo, y devuelve
+    (modelos, {nombre: segundos de ajuste}). Los hilos comparten X_train e
+    y_train sin copiarlos (solo se leen); el ajuste de sklearn/numpy libera
+    el GIL, así que el tiempo total queda acotado por el modelo más lento.
+    """
+    candidatos = construir_modelos(hiper)
+    with ThreadPoolExecutor(max_workers=hilos or len(candidatos)) as pool:
+        ajustados = list(pool.map(_ajustar, candidatos,
+                                  [X_train] * len(candidatos), [y_train] * len(candidatos)))
+    modelos = [modelo for modelo, _ in ajustados]
+    tiempos = {nombre: segundos for nombre, (_, segundos) in zip(NOMBRES, ajustados)}
+    return modelos, tiempos
+
+
+def entrenar_modelos(X_train, y_train, hiper=HIPERPARAMETROS):
+    return entrenar_con_tiempos(X_train, y_train, hiper)[0]
+
+
+def calcular_metricas(y_real, y_pred):
+    m = importar("sklearn.metrics")
+    return {
+        "RMSE": np.sqrt(m.mean_squared_error(y_real, y_pred)),
+        "MAE":  m.mean_absolute_error(y_real, y_pred),
+        "R²":   m.r2_score(y_real, y_pred),
+    }
+
+
+def rankear(df_res):
+    """Agrega el ranking combinado (menor rango promedio = mejor en las 3 métricas) y devuelve el mejor."""
+    df_res["rank_R2"]   = df_res["R²"].rank(ascending=False)
+    df_res["rank_RMSE"] = df_res["RMSE"].rank(ascending=True)
+    df_res["rank_MAE"]  = df_res["MAE"].rank(ascending=True)
+    df_res["rank_prom"] = (df_res["rank_R2"] + df_res["rank_RMSE"] + df_res["rank_MAE"]) / 3
+    return df_res["rank_prom"].idxmin()
+
+
+def evaluar_modelos(modelos, X_test, y_test, nombres=NOMBRES):
+    """Tabla RMSE / MAE / R² por modelo con ranking combinado, y el nombre del mejor modelo."""
+    resultados = [{"Modelo": nombre, **calcular_metricas(y_test, modelo.predict(X_test))}
+                  for nombre, modelo in zip(nombres, modelos)]
+    df_res = pd.DataFrame(resultados).set_index("Modelo")
+    return df_res, rankear(df_res)
+
+
+def _evaluar_pliegue(tarea, X, y, hiper):
+    i_modelo, pliegue, entrenamiento, prueba = tarea
+    # Un solo núcleo por tarea: el paralelismo está entre pliegues × modelos
+    modelo = construir_modelos(hiper, n_jobs=1)[i_modelo]
+    modelo.fit(X[entrenamiento], y[entrenamiento])
+    return {"Modelo": NOMBRES[i_modelo], "Pliegue": pliegue,
+            **calcular_metricas(y[prueba], modelo.predict(X[prueba]))}
+
+
+def validacion_cruzada(X, y, hiper=HIPERPARAMETROS, hilos=None):
+    """
+    Validación cruzada de k pliegues (hiper["pliegues"]) de los cuatro
+    modelos. Las k × 4 tareas corren en un pool de hilos que comparte X e y
+    (cada tarea solo guarda los índices de su pliegue).
+
+    Devuelve (df_cv, mejor_global, df_pliegues): df_cv tiene por modelo la
+    media de RMSE / MAE / R² entre pliegues, su desviación estándar en las
+    columnas "RMSE ±", "MAE ±", "R² ±" y el ranking combinado calculado sobre
+    las medias; df_pliegues tiene las métricas de cada pliegue.
+    """
+    KFold = importar("sklearn.model_selection").KFold
+    pliegues = KFold(n_splits=hiper["pliegues"], shuffle=True, random_state=hiper["random_state"])
+    tareas = [(i_modelo, pliegue, entrenamiento, prueba)
+              for pliegue, (entrenamiento, prueba) in enumerate(pliegues.split(X), start=1)
+              # Los modelos más lentos (MLP, RF) primero, para repartir mejor la carga
+              for i_modelo in reversed(range(len(NOMBRES)))]
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        filas = list(pool.map(_evaluar_pliegue, tareas,
+                              [X] * len(tareas), [y] * len(tareas), [hiper] * len(tareas)))
+    df_pliegues = pd.DataFrame(filas)
+
+    grupos = df_pliegues.groupby("Modelo", sort=False)[["RMSE", "MAE", "R²"]]
+    df_cv = grupos.mean().join(grupos.std(ddof=1).add_suffix(" ±")).reindex(NOMBRES)
+    df_cv.index.name = "Modelo"
+    return df_cv, rankear(df_cv), df_pliegues
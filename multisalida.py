@@ -0,0 +1,328 @@
+"""
+Ajuste multisalida: AGIT -200M contra la fracción -325M de todas las líneas
+a la vez (L1, L2/3/4, L5/6, L7/8, L8, L9, L10), sin repetir el flujo de
+app.py una vez por objetivo.
+
+Cada línea tiene sus propios huecos, así que los faltantes y la limpieza
+son por objetivo: una celda que falta o que es outlier (IQR del objetivo y
+Cook's D de su recta contra X) queda como NaN solo en ese objetivo, y cada
+objetivo se ajusta y se evalúa con sus filas presentes.
+
+- Lineal y polinomial: mínimos cuadrados de todos los objetivos en una
+  sola llamada (ecuaciones normales por objetivo con la máscara de
+  presentes, resueltas en lote); mismo resultado que un ajuste por objetivo.
+- Random Forest: un solo bosque multisalida con las filas que tienen todos
+  los objetivos, si son al menos FRACCION_COMPLETAS de las filas de cada
+  objetivo; si no, un bosque por objetivo.
+- MLP: una red por objetivo (la multisalida de sklearn no admite faltantes).
+
+Un objetivo sin filas suficientes para su modelo queda sin ajustar
+(predicción NaN) sin afectar a los demás.
+
+Los modelos finales (entrenados con todos los datos) y sus métricas se
+guardan en el registro local (ver registro.py, tipo "multisalida"): con
+el mismo CSV, limpieza e hiperparámetros no se vuelve a entrenar.
+
+Uso:
+    python multisalida.py "Data_Ordenada_Lineas_Agitador_Torta (1).csv" --salida metricas_lineas.csv
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import registro
+from carga import huella_archivo
+from importaciones import importar
+from modelos import (COLUMNA_X, HIPERPARAMETROS, LIMPIEZA, NOMBRES, calcular_metricas, construir_modelos,
+                     influencia_simple, mascara_iqr, rankear)
+
+COLUMNAS_OBJETIVO = ("L1 -325M", "L2/3/4 -325M", "L5/6 -325M", "L7/8 -325M",
+                     "L8 -325M", "L9 -325M", "L10 -325M")
+
+# Bosque conjunto solo si las filas completas son al menos esta fracción de las de cada objetivo
+FRACCION_COMPLETAS = 0.75
+# Filas mínimas de un objetivo para ajustarle un bosque o una red
+FILAS_MINIMAS = 10
+TIPO_REGISTRO = "multisalida"
+
+
+def preparar_multisalida(df, columna_x=COLUMNA_X, objetivos=COLUMNAS_OBJETIVO, limpieza=LIMPIEZA):
+    """
+    (X, Y, df_faltantes): X (n × 1) con las filas válidas de columna_x
+    (sin el valor erróneo y dentro del IQR), Y (n × objetivos) con NaN donde
+    el objetivo falta o es outlier, y una tabla por objetivo con las filas
+    con dato, faltantes, outliers quitados y filas limpias.
+    """
+    faltantes = [c for c in (columna_x, *objetivos) if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"El archivo no contiene las columnas: {', '.join(faltantes)}")
+
+    datos = df[[columna_x, *objetivos]].apply(pd.to_numeric, errors="coerce")
+    datos = datos[datos[columna_x].notna() & (datos[columna_x] < limpieza["malla_200_max"])]
+    datos = datos[mascara_iqr(datos[columna_x], limpieza["factor_iqr"])].reset_index(drop=True)
+    x = datos[columna_x].to_numpy()
+
+    filas = []
+    Y = np.full((len(datos), len(objetivos)), np.nan)
+    for j, objetivo in enumerate(objetivos):
+        serie = datos[objetivo]
+        presentes = serie.notna().to_numpy()
+        dentro = presentes & mascara_iqr(serie, limpieza["factor_iqr"]).to_numpy()
+        limpias = dentro.copy()
+        if dentro.sum() > 2:
+            _, _, cooks_d = influencia_simple(x[dentro], serie.to_numpy()[dentro])
+            limpias[dentro] = cooks_d < limpieza["cook_k"] / dentro.sum()
+        Y[limpias, j] = serie.to_numpy()[limpias]
+        filas.append({"Objetivo": objetivo, "Con dato": int(presentes.sum()),
+                      "Faltantes": int((~presentes).sum()),
+                      "Outliers": int(presentes.sum() - limpias.sum()), "Limpias": int(limpias.sum())})
+    return x.reshape(-1, 1), Y, pd.DataFrame(filas).set_index("Objetivo")
+
+
+class MinimosCuadradosMultiples:
+    """
+    Polinomio de grado `grado` en x ajustado por MCO a cada columna de Y con
+    sus filas presentes, todas en una llamada: para cada objetivo t,
+    (Φᵀ W_t Φ) β_t = Φᵀ W_t y_t con W_t la máscara de presentes. Un
+    objetivo con el sistema indeterminado (menos de grado + 1 valores
+    distintos de x) queda con coeficientes NaN.
+    """
+
+    def __init__(self, grado=1):
+        self.grado = grado
+        self.modo = "conjunto (MCO en lote)"
+
+    def _base(self, X):
+        # x estandarizada: las potencias quedan bien condicionadas
+        z = (np.asarray(X, dtype=float)[:, 0] - self.centro_) / self.escala_
+        return np.vander(z, self.grado + 1, increasing=True)
+
+    def fit(self, X, Y):
+        Y = np.asarray(Y, dtype=float).reshape(len(X), -1)
+        x = np.asarray(X, dtype=float)[:, 0]
+        self.centro_, self.escala_ = x.mean(), x.std() or 1.0
+        phi = self._base(X)
+        presentes = ~np.isnan(Y)
+        p, t = phi.shape[1], Y.shape[1]
+        productos = (phi[:, :, None] * phi[:, None, :]).reshape(len(phi), p * p)
+        gram = (productos.T @ presentes).T.reshape(t, p, p)
+        lado_derecho = (phi.T @ np.where(presentes, Y, 0.0)).T
+        self.coef_ = np.full((t, p), np.nan)
+        suficientes = presentes.sum(axis=0) >= p
+        try:
+            solucion = np.linalg.solve(gram[suficientes], lado_derecho[suficientes, :, None])
+            self.coef_[suficientes] = solucion[:, :, 0]
+        except np.linalg.LinAlgError:
+            # Algún objetivo con filas pero sin suficientes x distintas: uno por uno
+            for k in np.flatnonzero(suficientes):
+                solucion, _, rango, _ = np.linalg.lstsq(gram[k], lado_derecho[k], rcond=None)
+                if rango == p:
+                    self.coef_[k] = solucion
+        return self
+
+    def predict(self, X):
+        return self._base(X) @ self.coef_.T
+
+
+class SalidaConjunta:
+    """Estimador multisalida de sklearn ajustado una vez con las filas que tienen todos los objetivos."""
+
+    def __init__(self, base):
+        self.base = base
+        self.modo = "conjunto"
+
+    def fit(self, X, Y):
+        completas = ~np.isnan(Y).any(axis=1)
+        self.base.fit(X[completas], Y[completas])
+        self.modo = f"conjunto ({int(completas.sum())} filas completas)"
+        return self
+
+    def predict(self, X):
+        return np.asarray(self.base.predict(X)).reshape(len(X), -1)
+
+
+class PorObjetivo:
+    """Una copia del estimador por objetivo, cada una con sus filas presentes, ajustadas en hilos."""
+
+    def __init__(self, base, hilos=None):
+        self.base = base
+        self.hilos = hilos
+        self.modo = "por objetivo"
+
+    def fit(self, X, Y):
+        clone = importar("sklearn.base").clone
+
+        def ajustar(j):
+            presentes = ~np.isnan(Y[:, j])
+            if presentes.sum() < FILAS_MINIMAS:
+                return None
+            return clone(self.base).fit(X[presentes], Y[presentes, j])
+
+        with ThreadPoolExecutor(max_workers=self.hilos) as pool:
+            self.estimadores_ = list(pool.map(ajustar, range(Y.shape[1])))
+        return self
+
+    def predict(self, X):
+        return np.column_stack([np.full(len(X), np.nan) if e is None else e.predict(X)
+                                for e in self.estimadores_])
+
+
+def construir_multisalida(Y, hiper=HIPERPARAMETROS, n_jobs=-1, hilos=None):
+    """Los cuatro modelos multisalida sin entrenar, en el orden de NOMBRES (ver el módulo)."""
+    base = construir_modelos(hiper, n_jobs=n_jobs)
+    completas = (~np.isnan(Y).any(axis=1)).sum()
+    por_objetivo = (~np.isnan(Y)).sum(axis=0)
+    bosque = (SalidaConjunta(base[2])
+              if completas >= max(FILAS_MINIMAS, FRACCION_COMPLETAS * por_objetivo.max())
+              else PorObjetivo(base[2], hilos))
+    return [
+        MinimosCuadradosMultiples(1),
+        MinimosCuadradosMultiples(hiper["poly_grado"]),
+        bosque,
+        PorObjetivo(base[3], hilos),
+    ]
+
+
+def metricas_por_objetivo(Y_real, Y_pred, objetivos=COLUMNAS_OBJETIVO):
+    """{objetivo: métricas} sobre las filas donde ese objetivo tiene dato (y predicción)."""
+    resultado = {}
+    for j, objetivo in enumerate(objetivos):
+        presentes = ~np.isnan(Y_real[:, j]) & ~np.isnan(Y_pred[:, j])
+        if presentes.sum() >= 2:
+            resultado[objetivo] = calcular_metricas(Y_real[presentes, j], Y_pred[presentes, j])
+    return resultado
+
+
+def _evaluar_pliegue_multi(tarea, X, Y, hiper, objetivos):
+    i_modelo, pliegue, entrenamiento, prueba = tarea
+    modelo = construir_multisalida(Y[entrenamiento], hiper, n_jobs=1, hilos=1)[i_modelo]
+    inicio = time.perf_counter()
+    modelo.fit(X[entrenamiento], Y[entrenamiento])
+    segundos = time.perf_counter() - inicio
+    metricas = metricas_por_objetivo(Y[prueba], modelo.predict(X[prueba]), objetivos)
+    return [{"Objetivo": objetivo, "Modelo": NOMBRES[i_modelo], "Pliegue": pliegue,
+             "Ajuste": modelo.modo, "Segundos ajuste": segundos, **valores}
+            for objetivo, valores in metricas.items()]
+
+
+def validacion_multisalida(X, Y, hiper=HIPERPARAMETROS, objetivos=COLUMNAS_OBJETIVO, hilos=None):
+    """
+    Validación cruzada de k pliegues de los cuatro modelos multisalida
+    (pliegues × modelos en un pool de hilos, como validacion_cruzada).
+
+    Devuelve (df_metricas, mejores): df_metricas tiene un renglón por
+    objetivo y modelo con la media y desviación de RMSE / MAE / R², el
+    modo de ajuste, el tiempo medio de ajuste (de todos los objetivos) y
+    el ranking combinado dentro del objetivo; mejores es {objetivo: modelo}.
+    """
+    KFold = importar("sklearn.model_selection").KFold
+    pliegues = KFold(n_splits=hiper["pliegues"], shuffle=True, random_state=hiper["random_state"])
+    tareas = [(i_modelo, pliegue, entrenamiento, prueba)
+              for pliegue, (entrenamiento, prueba) in enumerate(pliegues.split(X), start=1)
+              for i_modelo in reversed(range(len(NOMBRES)))]
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        filas = [fila for resultado in pool.map(_evaluar_pliegue_multi, tareas, [X] * len(tareas),
+                                                [Y] * len(tareas), [hiper] * len(tareas),
+                                                [objetivos] * len(tareas))
+                 for fila in resultado]
+    df_pliegues = pd.DataFrame(filas)
+
+    tablas, mejores = [], {}
+    for objetivo, grupo in df_pliegues.groupby("Objetivo", sort=False):
+        metricas = grupo.groupby("Modelo", sort=False)[["RMSE", "MAE", "R²"]]
+        tabla = metricas.mean().join(metricas.std(ddof=1).add_suffix(" ±")).reindex(NOMBRES)
+        tabla.index.name = "Modelo"
+        tabla["Ajuste"] = grupo.groupby("Modelo", sort=False)["Ajuste"].first()
+        tabla["Segundos ajuste"] = grupo.groupby("Modelo", sort=False)["Segundos ajuste"].mean()
+        mejores[objetivo] = rankear(tabla)
+        tablas.append(tabla.reset_index().assign(Objetivo=objetivo))
+
+    df_metricas = pd.concat(tablas, ignore_index=True)
+    df_metricas["Objetivo"] = pd.Categorical(df_metricas["Objetivo"], categories=list(objetivos), ordered=True)
+    df_metricas = df_metricas.sort_values(["Objetivo", "rank_prom"]).set_index(["Objetivo", "Modelo"])
+    return df_metricas, mejores
+
+
+def entrenar_multisalida(X, Y, hiper=HIPERPARAMETROS):
+    """Los cuatro modelos multisalida ajustados con todos los datos, y {nombre: segundos}."""
+    modelos, tiempos = construir_multisalida(Y, hiper), {}
+    for nombre, modelo in zip(NOMBRES, modelos):
+        inicio = time.perf_counter()
+        modelo.fit(X, Y)
+        tiempos[nombre] = time.perf_counter() - inicio
+    return modelos, tiempos
+
+
+def obtener_multisalida(ruta_csv, hiper=HIPERPARAMETROS, limpieza=LIMPIEZA, objetivos=COLUMNAS_OBJETIVO):
+    """
+    Entrada multisalida del registro para el CSV: la guardada si existe, o
+    la que resulta de validar y entrenar ahora. Devuelve (entrada,
+    desde_registro); la entrada tiene "modelos", "tiempos_ajuste",
+    "df_metricas", "mejores", "df_faltantes", "objetivos", "total_cv" y
+    "rango" (mínimo y máximo de X con que se entrenó).
+    """
+    clave = registro.clave_registro(huella_archivo(ruta_csv), limpieza,
+                                    [hiper, list(objetivos), FRACCION_COMPLETAS, FILAS_MINIMAS])
+    entrada = registro.cargar(ruta_csv, clave, TIPO_REGISTRO)
+    if entrada is not None:
+        return entrada, True
+
+    X, Y, df_faltantes = preparar_multisalida(pd.read_csv(ruta_csv), objetivos=objetivos, limpieza=limpieza)
+    inicio = time.perf_counter()
+    df_metricas, mejores = validacion_multisalida(X, Y, hiper, objetivos)
+    total_cv = time.perf_counter() - inicio
+    modelos, tiempos_ajuste = entrenar_multisalida(X, Y, hiper)
+
+    entrada = {
+        "modelos": modelos, "tiempos_ajuste": tiempos_ajuste,
+        "df_metricas": df_metricas, "mejores": mejores, "df_faltantes": df_faltantes,
+        "objetivos": list(objetivos), "total_cv": total_cv,
+        "rango": (float(X.min()), float(X.max())),
+    }
+    registro.guardar(ruta_csv, clave, entrada, TIPO_REGISTRO)
+    return entrada, False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AGIT -200M contra la fracción -325M de todas las líneas.")
+    parser.add_argument("datos", help="CSV Data_Ordenada con las columnas de las líneas")
+    parser.add_argument("--salida", help="guarda la tabla de métricas por objetivo y modelo en este CSV")
+    args = parser.parse_args()
+
+    try:
+        entrada, desde_registro = obtener_multisalida(args.datos)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    pd.set_option("display.width", 200)
+    origen = "registro" if desde_registro else f"entrenados ahora, guardados en {registro.DIRECTORIO_REGISTRO}"
+    print(f"Modelos multisalida ({origen})")
+    print(entrada["df_faltantes"].to_string())
+
+    df_metricas = entrada["df_metricas"]
+    print(f"\nValidación cruzada ({HIPERPARAMETROS['pliegues']} pliegues, {entrada['total_cv']:.1f} s)")
+    columnas = ["RMSE", "RMSE ±", "MAE", "R²", "R² ±", "Ajuste", "Segundos ajuste"]
+    print(df_metricas[columnas].round(4).to_string())
+
+    print("\nAjuste final con todos los datos:")
+    for nombre, modelo in zip(NOMBRES, entrada["modelos"]):
+        print(f"  {nombre:<26} {modelo.modo:<28} {entrada['tiempos_ajuste'][nombre]:.2f} s")
+
+    print("\nMejor modelo por objetivo:")
+    for objetivo, nombre in entrada["mejores"].items():
+        print(f"  {objetivo:<14} {nombre}  (R² {df_metricas.loc[(objetivo, nombre), 'R²']:.3f})")
+
+    if args.salida:
+        df_metricas.to_csv(args.salida)
+        print(f"\n  → Guardada: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Predicción por lotes de AGIT -325M a partir de lecturas de AGIT -200M.
+
+Lee un CSV (o la entrada estándar) por bloques, predice cada bloque con
+una sola llamada a predict por modelo y escribe el resultado en CSV a
+medida que avanza. Los modelos salen del registro local (registro.py):
+si los datos de entrenamiento no cambiaron no se reentrena nada.
+
+Uso:
+    python prediccion.py lecturas_turno.csv --datos "Data_Ordenada_Lineas_Agitador_Torta (1).csv"
+    python prediccion.py lecturas.csv --datos historico.csv --todos --salida predicciones.csv
+    cat valores.txt | python prediccion.py - --datos historico.csv --sin-cabecera
+    python prediccion.py lecturas.csv --datos historico.csv --compilado
+
+Con --compilado cada modelo se tabula una vez (ver compilado.py) y se
+informa su error máximo frente al modelo original.
+
+La fila i de la salida corresponde a la línea de datos i de la entrada:
+las líneas vacías o no numéricas dan NaN en vez de desaparecer.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+import registro
+from compilado import compilar
+from modelos import COLUMNA_X, COLUMNA_Y, NOMBRES
+
+FILAS_POR_BLOQUE = 100_000
+
+
+def predecir_bloque(valores, modelos_elegidos):
+    """DataFrame con los valores de entrada y una columna de predicción por modelo."""
+    X = np.asarray(valores, dtype=float).reshape(-1, 1)
+    resultado = pd.DataFrame({COLUMNA_X: X[:, 0]})
+    validos = ~np.isnan(X[:, 0])
+    for nombre, modelo in modelos_elegidos.items():
+        prediccion = np.full(len(X), np.nan)
+        if validos.any():
+            prediccion[validos] = modelo.predict(X[validos])
+        resultado[f"{COLUMNA_Y} pred. ({nombre})"] = prediccion
+    return resultado
+
+
+def leer_bloques(entrada, columna, sin_cabecera, filas_por_bloque):
+    """Genera arreglos de valores de AGIT -200M leyendo el CSV por bloques (líneas vacías → NaN)."""
+    origen = sys.stdin if entrada == "-" else entrada
+    if sin_cabecera:
+        lector = pd.read_csv(origen, header=None, usecols=[0], chunksize=filas_por_bloque,
+                             skip_blank_lines=False)
+        for bloque in lector:
+            yield pd.to_numeric(bloque[0], errors="coerce").to_numpy()
+        return
+    lector = pd.read_csv(origen, chunksize=filas_por_bloque, skip_blank_lines=False)
+    for bloque in lector:
+        if columna not in bloque.columns:
+            raise ValueError(f"La entrada no contiene la columna '{columna}'. "
+                             f"Usa --columna o --sin-cabecera.")
+        yield pd.to_numeric(bloque[columna], errors="coerce").to_numpy()
+
+
+def predecir_flujo(bloques, modelos_elegidos, salida):
+    """Escribe en `salida` (ruta o archivo abierto) las predicciones de cada bloque. Devuelve las filas."""
+    filas = 0
+    for i, valores in enumerate(bloques):
+        predecir_bloque(valores, modelos_elegidos).to_csv(
+            salida, mode="w" if i == 0 else "a", header=i == 0, index=False, float_format="%.4f")
+        filas += len(valores)
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predicción por lotes de AGIT -325M desde AGIT -200M.")
+    parser.add_argument("entrada", help="CSV con las lecturas de AGIT -200M, o '-' para la entrada estándar")
+    parser.add_argument("--datos", required=True, help="CSV de entrenamiento (el mismo de malla 200.py)")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--modelo", choices=NOMBRES, help="modelo a usar (por defecto, el mejor global)")
+    grupo.add_argument("--todos", action="store_true", help="una columna de predicción por cada modelo")
+    parser.add_argument("--columna", default=COLUMNA_X, help=f"columna de entrada (por defecto '{COLUMNA_X}')")
+    parser.add_argument("--sin-cabecera", action="store_true", help="la entrada es una columna de números sin cabecera")
+    parser.add_argument("--salida", help="CSV de salida (por defecto, la salida estándar)")
+    parser.add_argument("--filas-por-bloque", type=int, default=FILAS_POR_BLOQUE)
+    parser.add_argument("--compilado", action="store_true",
+                        help="predice con los modelos tabulados (más rápido; error máximo informado)")
+    args = parser.parse_args()
+
+    entrada, _, desde_registro = registro.obtener(args.datos)
+    modelos = dict(zip(NOMBRES, entrada["modelos"]))
+    if args.todos:
+        elegidos = modelos
+    else:
+        nombre = args.modelo or entrada["mejor_global"]
+        elegidos = {nombre: modelos[nombre]}
+
+    origen = "registro" if desde_registro else "entrenados ahora"
+    print(f"Modelos ({origen}): {', '.join(elegidos)}", file=sys.stderr)
+    if args.compilado:
+        elegidos = dict(zip(elegidos, compilar(elegidos.values(), *entrada["rango"])))
+        for nombre, compilado in elegidos.items():
+            print(f"  {nombre} compilado ({compilado.modo}, {len(compilado.nodos)} nodos): "
+                  f"error máx. {compilado.error_maximo:.2e}", file=sys.stderr)
+
+    bloques = leer_bloques(args.entrada, args.columna, args.sin_cabecera, args.filas_por_bloque)
+    try:
+        filas = predecir_flujo(bloques, elegidos, args.salida or sys.stdout)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    desde, hasta = entrada["rango"]
+    print(f"{filas} filas predichas. Rango de entrenamiento de {COLUMNA_X}: "
+          f"{desde:.1f} – {hasta:.1f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Registro local de modelos entrenados para no reentrenar en cada ejecución.
+
+Cada entrada guarda los modelos ajustados y sus métricas en
+.cache_modelos/registro/, con una clave calculada a partir de la huella
+del contenido del CSV, los parámetros de limpieza, los hiperparámetros y
+la versión de scikit-learn. Si cambia cualquiera de ellos la clave cambia
+y la entrada se reconstruye; al guardar la nueva se borran las anteriores
+del mismo archivo y tipo. El tipo separa entradas de distinto contenido
+sobre el mismo CSV (p. ej. "multisalida", ver multisalida.py).
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import time
+
+import pandas as pd
+
+from carga import huella_archivo
+from importaciones import importar
+from modelos import (DIRECTORIO_MODELOS, HIPERPARAMETROS, LIMPIEZA, entrenar_con_tiempos,
+                     limpiar_outliers, matrices, preparar_datos, validacion_cruzada)
+
+DIRECTORIO_REGISTRO = os.path.join(DIRECTORIO_MODELOS, "registro")
+
+
+def clave_registro(huella, limpieza, hiper):
+    """Clave de la entrada: datos + limpieza + hiperparámetros + versión de sklearn."""
+    version = importar("sklearn").__version__
+    texto = json.dumps([huella, limpieza, hiper, version], sort_keys=True, default=list)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:20]
+
+
+def _base(ruta_csv, tipo):
+    nombre = os.path.basename(ruta_csv)
+    return nombre if tipo is None else f"{nombre}.{tipo}"
+
+
+def ruta_entrada(ruta_csv, clave, tipo=None):
+    return os.path.join(DIRECTORIO_REGISTRO, f"{_base(ruta_csv, tipo)}.{clave}.pkl")
+
+
+def cargar(ruta_csv, clave, tipo=None):
+    """Contenido guardado para esa clave, o None si no existe o no se puede leer."""
+    try:
+        with open(ruta_entrada(ruta_csv, clave, tipo), "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # Ausente, truncada o de otra versión de las librerías: se reentrena
+        return None
+
+
+def _borrar_anteriores(ruta_csv, vigente, tipo=None):
+    # Solo "<base>.<clave>.pkl": las entradas de otro tipo del mismo CSV se conservan
+    patron = re.compile(re.escape(_base(ruta_csv, tipo)) + r"\.[0-9a-f]+\.pkl")
+    for nombre in os.listdir(DIRECTORIO_REGISTRO):
+        completo = os.path.join(DIRECTORIO_REGISTRO, nombre)
+        if patron.fullmatch(nombre) and completo != vigente:
+            try:
+                os.remove(completo)
+            except OSError:
+                pass
+
+
+def guardar(ruta_csv, clave, contenido, tipo=None):
+    """Guarda la entrada (escritura atómica) y borra las versiones anteriores del mismo CSV y tipo."""
+    ruta = ruta_entrada(ruta_csv, clave, tipo)
+    try:
+        os.makedirs(DIRECTORIO_REGISTRO, exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as f:
+            pickle.dump(contenido, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+        _borrar_anteriores(ruta_csv, ruta, tipo)
+    except OSError:
+        pass
+
+
+def obtener(ruta_csv, X=None, y=None, hiper=HIPERPARAMETROS, limpieza=LIMPIEZA):
+    """
+    Entrada del registro para el CSV: la guardada si existe, o la que
+    resulta de entrenar y validar ahora. X, y son los datos ya limpios con
+    `limpieza`; si no se pasan y hay que entrenar, se leen y limpian del CSV.
+
+    Devuelve (entrada, clave, desde_registro). La entrada tiene "modelos",
+    "tiempos_ajuste", "total_ajuste", "df_res", "mejor_global",
+    "df_pliegues", "total_cv" y "rango" (mínimo y máximo de malla_200
+    con que se entrenó).
+    """
+    clave = clave_registro(huella_archivo(ruta_csv), limpieza, hiper)
+    entrada = cargar(ruta_csv, clave)
+    if entrada is not None:
+        return entrada, clave, True
+
+    if X is None:
+        datos = preparar_datos(pd.read_csv(ruta_csv), limpieza=limpieza)
+        X, y = matrices(limpiar_outliers(datos, limpieza=limpieza)[1])
+
+    # Modelos finales con todos los datos limpios, en paralelo (un hilo por modelo)
+    inicio = time.perf_counter()
+    modelos, tiempos_ajuste = entrenar_con_tiempos(X, y, hiper)
+    total_ajuste = time.perf_counter() - inicio
+
+    # Validación cruzada de k pliegues × 4 modelos en paralelo
+    inicio = time.perf_counter()
+    df_res, mejor_global, df_pliegues = validacion_cruzada(X, y, hiper)
+    total_cv = time.perf_counter() - inicio
+
+    entrada = {
+        "modelos": modelos, "tiempos_ajuste": tiempos_ajuste, "total_ajuste": total_ajuste,
+        "df_res": df_res, "mejor_global": mejor_global,
+        "df_pliegues": df_pliegues, "total_cv": total_cv,
+        "rango": (float(X.min()), float(X.max())),
+    }
+    guardar(ruta_csv, clave, entrada)
+    return entrada, clave, False
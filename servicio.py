@@ -0,0 +1,245 @@
+"""
+Servicio HTTP local de predicción de AGIT -325M.
+
+Carga los modelos una sola vez (del registro, ver registro.py) y agrupa las
+solicitudes que llegan al mismo tiempo en microlotes: un hilo junta lo que
+llegó durante unos milisegundos y hace una sola llamada a predict por
+modelo para todo el lote. Expone contadores de latencia (p50 / p99) y de
+rendimiento.
+
+Uso:
+    python servicio.py --datos "Data_Ordenada_Lineas_Agitador_Torta (1).csv" --puerto 8765
+
+    curl "http://127.0.0.1:8765/predecir?x=87.5"
+    curl -X POST http://127.0.0.1:8765/predecir -d '{"valores": [80, 85.5], "modelo": "todos"}'
+    curl http://127.0.0.1:8765/metricas
+
+Con --compilado los modelos se sirven tabulados (ver compilado.py).
+"""
+
+import argparse
+import json
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+import registro
+from compilado import compilar
+from modelos import NOMBRES
+
+ESPERA_MS = 2
+MAX_LOTE = 4096
+# Latencias recientes que se guardan para los percentiles
+VENTANA_LATENCIAS = 10_000
+# Conexiones en espera de aceptar (el valor por omisión, 5, corta ráfagas de clientes)
+COLA_CONEXIONES = 128
+
+
+class Lotizador:
+    """
+    Cola de solicitudes atendida por un hilo que predice en microlotes.
+
+    predecir() encola los valores y espera; el hilo toma la primera
+    solicitud, junta las que lleguen en los siguientes `espera_ms` (hasta
+    `max_lote` valores), predice todo junto y reparte los resultados.
+    """
+
+    def __init__(self, modelos, espera_ms=ESPERA_MS, max_lote=MAX_LOTE):
+        # Lotes chicos: el pool de hilos interno del Random Forest cuesta más de lo que ahorra
+        for modelo in modelos.values():
+            if hasattr(modelo, "get_params") and "n_jobs" in modelo.get_params():
+                modelo.set_params(n_jobs=1)
+        self.modelos = modelos
+        self.espera_s = espera_ms / 1000
+        self.max_lote = max_lote
+        self._cola = queue.Queue()
+        self._candado = threading.Lock()
+        self._latencias = deque(maxlen=VENTANA_LATENCIAS)
+        self.inicio = time.monotonic()
+        self.solicitudes = 0
+        self.valores = 0
+        self.lotes = 0
+        self.errores = 0
+        threading.Thread(target=self._atender, name="microlotes", daemon=True).start()
+
+    def predecir(self, valores, nombres):
+        """{modelo: [predicciones]} para los valores dados; bloquea hasta que su lote se procese."""
+        inicio = time.perf_counter()
+        futuro = Future()
+        self._cola.put((np.asarray(valores, dtype=float).ravel(), tuple(nombres), futuro))
+        try:
+            return futuro.result()
+        finally:
+            with self._candado:
+                self._latencias.append(time.perf_counter() - inicio)
+                self.solicitudes += 1
+                self.valores += len(valores)
+
+    def _juntar(self):
+        pendientes = [self._cola.get()]
+        cantidad = len(pendientes[0][0])
+        limite = time.monotonic() + self.espera_s
+        while cantidad < self.max_lote:
+            restante = limite - time.monotonic()
+            try:
+                pendiente = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            pendientes.append(pendiente)
+            cantidad += len(pendiente[0])
+        return pendientes
+
+    def _atender(self):
+        while True:
+            pendientes = self._juntar()
+            try:
+                X = np.concatenate([valores for valores, _, _ in pendientes]).reshape(-1, 1)
+                necesarios = {nombre for _, nombres, _ in pendientes for nombre in nombres}
+                predicciones = {nombre: self.modelos[nombre].predict(X) for nombre in necesarios}
+            except Exception as e:
+                with self._candado:
+                    self.errores += len(pendientes)
+                for _, _, futuro in pendientes:
+                    futuro.set_exception(e)
+                continue
+
+            with self._candado:
+                self.lotes += 1
+            desde = 0
+            for valores, nombres, futuro in pendientes:
+                hasta = desde + len(valores)
+                futuro.set_result({nombre: predicciones[nombre][desde:hasta].tolist() for nombre in nombres})
+                desde = hasta
+
+    def metricas(self):
+        """Contadores: solicitudes, valores, lotes, latencia p50 / p99 (ms) y rendimiento."""
+        with self._candado:
+            latencias = np.array(self._latencias) * 1000
+            transcurrido = time.monotonic() - self.inicio
+            p50, p99 = np.percentile(latencias, [50, 99]) if len(latencias) else (None, None)
+            return {
+                "solicitudes": self.solicitudes,
+                "valores": self.valores,
+                "lotes": self.lotes,
+                "errores": self.errores,
+                "valores_por_lote": self.valores / self.lotes if self.lotes else None,
+                "latencia_p50_ms": p50,
+                "latencia_p99_ms": p99,
+                "solicitudes_por_s": self.solicitudes / transcurrido,
+                "valores_por_s": self.valores / transcurrido,
+                "segundos_activo": transcurrido,
+            }
+
+
+def crear_servidor(lotizador, mejor_global, host="127.0.0.1", puerto=8765):
+    """ThreadingHTTPServer con /predecir (GET ?x=... o POST JSON), /metricas y /salud."""
+
+    class Manejador(BaseHTTPRequestHandler):
+        def _responder(self, estado, cuerpo):
+            datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(estado)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def _predecir(self, valores, modelo):
+            if modelo is not None and not isinstance(modelo, str):
+                return self._responder(400, {"error": "El modelo debe ser un texto.", "modelos": NOMBRES})
+            # Un texto se recorrería carácter por carácter ("85" → 8 y 5)
+            if not isinstance(valores, list):
+                return self._responder(400, {"error": 'Los valores deben ser una lista. Ej: {"valores": [87.5]}'})
+            if modelo == "todos":
+                nombres = NOMBRES
+            elif modelo in (None, ""):
+                nombres = [mejor_global]
+            elif modelo in lotizador.modelos:
+                nombres = [modelo]
+            else:
+                return self._responder(400, {"error": f"Modelo desconocido: '{modelo}'.", "modelos": NOMBRES})
+            try:
+                valores = [float(v) for v in valores]
+            except (TypeError, ValueError):
+                valores = [math.nan]
+            # Un valor inválido haría fallar el microlote completo, con otras solicitudes
+            if not all(math.isfinite(v) for v in valores):
+                return self._responder(400, {"error": "Los valores de AGIT -200M deben ser números."})
+            if not valores:
+                return self._responder(400, {"error": "No se enviaron valores."})
+            try:
+                predicciones = lotizador.predecir(valores, nombres)
+            except Exception as e:
+                return self._responder(500, {"error": f"Error al predecir: {e}"})
+            self._responder(200, {"valores": valores, "predicciones": predicciones})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/salud":
+                return self._responder(200, {"estado": "ok", "modelos": NOMBRES, "mejor_global": mejor_global})
+            if url.path == "/metricas":
+                return self._responder(200, lotizador.metricas())
+            if url.path == "/predecir":
+                parametros = parse_qs(url.query)
+                return self._predecir(parametros.get("x", []), parametros.get("modelo", [None])[0])
+            self._responder(404, {"error": "Rutas: /predecir, /metricas, /salud."})
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/predecir":
+                return self._responder(404, {"error": "Solo POST /predecir."})
+            try:
+                largo = int(self.headers.get("Content-Length", 0))
+                cuerpo = json.loads(self.rfile.read(largo) or b"{}")
+                valores = cuerpo.get("valores", [cuerpo["x"]] if "x" in cuerpo else [])
+            except (ValueError, AttributeError):
+                return self._responder(400, {"error": 'Cuerpo JSON inválido. Ej: {"valores": [87.5]}'})
+            self._predecir(valores, cuerpo.get("modelo"))
+
+        def log_message(self, formato, *args):
+            pass  # sin una línea por solicitud; ver /metricas
+
+    class Servidor(ThreadingHTTPServer):
+        request_queue_size = COLA_CONEXIONES
+
+    return Servidor((host, puerto), Manejador)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de predicción de AGIT -325M.")
+    parser.add_argument("--datos", required=True, help="CSV de entrenamiento (el mismo de malla 200.py)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--espera-ms", type=float, default=ESPERA_MS, help="espera máxima para armar un microlote")
+    parser.add_argument("--max-lote", type=int, default=MAX_LOTE, help="valores máximos por microlote")
+    parser.add_argument("--compilado", action="store_true",
+                        help="sirve los modelos tabulados (más rápido; error máximo informado)")
+    args = parser.parse_args()
+
+    entrada, _, desde_registro = registro.obtener(args.datos)
+    modelos = entrada["modelos"]
+    if args.compilado:
+        modelos = compilar(modelos, *entrada["rango"])
+        for nombre, compilado in zip(NOMBRES, modelos):
+            print(f"{nombre} compilado ({compilado.modo}): error máx. {compilado.error_maximo:.2e}")
+    lotizador = Lotizador(dict(zip(NOMBRES, modelos)), args.espera_ms, args.max_lote)
+    servidor = crear_servidor(lotizador, entrada["mejor_global"], args.host, args.puerto)
+
+    origen = "registro" if desde_registro else "entrenados ahora"
+    print(f"Modelos cargados ({origen}); mejor global: {entrada['mejor_global']}")
+    print(f"Escuchando en http://{args.host}:{args.puerto}  (Ctrl+C para terminar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
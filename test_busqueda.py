@@ -0,0 +1,29 @@
+"""Pruebas de los candidatos de la búsqueda de hiperparámetros."""
+
+import pytest
+
+from busqueda import CANDIDATOS, ESPACIOS, _candidatos, parametros_vigentes
+from modelos import HIPERPARAMETROS
+
+
+@pytest.mark.parametrize("modelo", list(ESPACIOS))
+def test_parametros_actuales_son_el_primer_candidato(modelo):
+    espacio = ESPACIOS[modelo]
+    vigentes = parametros_vigentes(modelo)
+    candidatos = _candidatos(espacio, CANDIDATOS, [HIPERPARAMETROS[modelo]], semilla=0, completar=vigentes)
+    esperado = {clave: vigentes[clave] for clave in espacio}
+    assert candidatos[0] == esperado
+    # Los valores de HIPERPARAMETROS mandan sobre los por omisión del estimador
+    assert all(candidatos[0][clave] == valor for clave, valor in HIPERPARAMETROS[modelo].items()
+               if clave in espacio)
+
+
+@pytest.mark.parametrize("modelo", list(ESPACIOS))
+@pytest.mark.parametrize("semilla", range(5))
+def test_parametros_actuales_entran_con_arranque_en_caliente(modelo, semilla):
+    # Con una configuración guardada delante, los actuales siguen entre los primeros
+    anterior = {clave: valores[-1] for clave, valores in ESPACIOS[modelo].items()}
+    vigentes = parametros_vigentes(modelo)
+    candidatos = _candidatos(ESPACIOS[modelo], CANDIDATOS, [anterior, HIPERPARAMETROS[modelo]],
+                             semilla=semilla, completar=vigentes)
+    assert {clave: vigentes[clave] for clave in ESPACIOS[modelo]} in candidatos[:2]
@@ -0,0 +1,62 @@
+"""Pruebas de la ingesta incremental con un recorte de sulfuros.csv."""
+
+import os
+
+import numpy as np
+import pytest
+
+from carga import parsear_csv
+from incremental import BYTES_FIRMA, sumas_incrementales
+from leyes import ESQUEMA_SULFUROS, sumas_por_banda
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def lineas():
+    with open(os.path.join(DIRECTORIO, "sulfuros.csv"), "rb") as f:
+        return f.read().splitlines(keepends=True)
+
+
+def _completo(ruta):
+    return sumas_por_banda(parsear_csv(ruta), ESQUEMA_SULFUROS)
+
+
+def _editar_fila(ruta, fila):
+    """Cambia el TMS de una fila sin cambiar el largo del archivo."""
+    with open(ruta, "rb") as f:
+        contenido = f.read().splitlines(keepends=True)
+    campos = contenido[fila].split(b";")
+    campos[3] = b"9" + campos[3][1:]
+    contenido[fila] = b";".join(campos)
+    with open(ruta, "wb") as f:
+        f.write(b"".join(contenido))
+
+
+def test_agregar_filas(tmp_path, lineas):
+    ruta = tmp_path / "leyes.csv"
+    ruta.write_bytes(b"".join(lineas[:300]))
+    sumas_incrementales(str(ruta), ESQUEMA_SULFUROS)
+    with open(ruta, "ab") as f:
+        f.write(b"".join(lineas[300:600]))
+    np.testing.assert_allclose(sumas_incrementales(str(ruta), ESQUEMA_SULFUROS), _completo(ruta))
+
+
+def test_edicion_reciente_se_detecta(tmp_path, lineas):
+    ruta = tmp_path / "leyes.csv"
+    ruta.write_bytes(b"".join(lineas[:600]))
+    sumas_incrementales(str(ruta), ESQUEMA_SULFUROS)
+    _editar_fila(ruta, 598)
+    np.testing.assert_allclose(sumas_incrementales(str(ruta), ESQUEMA_SULFUROS), _completo(ruta))
+
+
+def test_edicion_antigua_con_verificar_todo(tmp_path, lineas):
+    ruta = tmp_path / "leyes.csv"
+    ruta.write_bytes(b"".join(lineas[:600]))
+    assert len(b"".join(lineas[2:600])) > BYTES_FIRMA
+    sumas_incrementales(str(ruta), ESQUEMA_SULFUROS, verificar_todo=True)
+    _editar_fila(ruta, 1)
+    with open(ruta, "ab") as f:
+        f.write(b"".join(lineas[600:700]))
+    np.testing.assert_allclose(
+        sumas_incrementales(str(ruta), ESQUEMA_SULFUROS, verificar_todo=True), _completo(ruta))
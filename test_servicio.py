@@ -0,0 +1,72 @@
+"""Pruebas del servicio de predicción en localhost (puerto libre, modelos lineales chicos)."""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from modelos import NOMBRES
+from servicio import Lotizador, crear_servidor
+
+
+@pytest.fixture
+def servicio():
+    X = np.arange(60, 100, dtype=float).reshape(-1, 1)
+    modelos = {nombre: LinearRegression().fit(X, 0.5 * X[:, 0] + i) for i, nombre in enumerate(NOMBRES)}
+    lotizador = Lotizador(modelos, espera_ms=50)
+    servidor = crear_servidor(lotizador, NOMBRES[0], puerto=0)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor.server_address[1], lotizador
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _post(puerto, cuerpo):
+    conexion = HTTPConnection("127.0.0.1", puerto, timeout=10)
+    try:
+        conexion.request("POST", "/predecir", body=json.dumps(cuerpo))
+        respuesta = conexion.getresponse()
+        return respuesta.status, json.loads(respuesta.read())
+    finally:
+        conexion.close()
+
+
+def test_solicitud_valida(servicio):
+    puerto, _ = servicio
+    estado, cuerpo = _post(puerto, {"valores": [80, 85.5], "modelo": "todos"})
+    assert estado == 200
+    assert cuerpo["valores"] == [80.0, 85.5]
+    assert cuerpo["predicciones"][NOMBRES[1]] == pytest.approx([41.0, 43.75])
+
+
+@pytest.mark.parametrize("modelo", [["x"], 3, {"a": 1}, "no existe"])
+def test_modelo_invalido(servicio, modelo):
+    puerto, _ = servicio
+    estado, cuerpo = _post(puerto, {"valores": [80], "modelo": modelo})
+    assert estado == 400
+    assert "modelos" in cuerpo
+
+
+@pytest.mark.parametrize("valores", ["85", 85, [], ["a"], [float("nan")], [[80]]])
+def test_valores_invalidos(servicio, valores):
+    puerto, _ = servicio
+    estado, _ = _post(puerto, {"valores": valores})
+    assert estado == 400
+
+
+def test_microlote_concurrente(servicio):
+    puerto, lotizador = servicio
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        respuestas = list(pool.map(lambda v: _post(puerto, {"valores": [v]}), range(60, 92)))
+    assert all(estado == 200 for estado, _ in respuestas)
+    # Cada solicitud recibe su propia predicción aunque se hayan juntado en un lote
+    for v, (_, cuerpo) in zip(range(60, 92), respuestas):
+        assert cuerpo["predicciones"][NOMBRES[0]] == pytest.approx([0.5 * v])
+    metricas = lotizador.metricas()
+    assert metricas["solicitudes"] == 32
+    assert metricas["lotes"] < 32